@@ -0,0 +1,126 @@
+from collections import namedtuple
+from dominio import claveCategoria
+from indices import claveCodigo
+from reloj import ahora
+
+# =============================================================================
+# ALERTAS DE STOCK BAJO
+# =============================================================================
+# Los umbrales se registran por producto (por código) o por categoría; el del
+# producto tiene prioridad. Conectado con Inventario.set_vigilanteStock(), el
+# vigilante se entera de cada cambio de stock del mismo modo que los índices
+# y revisa sólo ese producto: dos consultas a diccionarios por cambio, nunca
+# un recorrido del inventario. Sólo se recorre algo al conectarlo (todo el
+# inventario, una vez) y al fijar un umbral de categoría (esa categoría).
+#
+# Un producto entra en alerta cuando su cantidad queda en su umbral o por
+# debajo, y sale cuando lo supera. Los oyentes suscritos reciben la Alerta en
+# el momento en que el producto entra, no en cada cambio posterior.
+
+Alerta = namedtuple("Alerta", "codigo nombre categoria cantidad umbral marca")
+
+
+def _validarUmbral(umbral):
+    if isinstance(umbral, bool) or not isinstance(umbral, int) or umbral < 0:
+        raise ValueError("El umbral debe ser un número entero no negativo.")
+    return umbral
+
+
+class VigilanteStock:
+    def __init__(self):
+        self.__porProducto = {}   # claveCodigo -> umbral
+        self.__porCategoria = {}  # claveCategoria -> umbral
+        self.__activas = {}       # producto -> Alerta, en orden de disparo
+        self.__oyentes = []
+        self.__inventario = None
+
+    def __len__(self):
+        return len(self.__activas)
+
+    def conectar(self, inventario):
+        """Lo llama Inventario.set_vigilanteStock(); revisa una vez lo que ya hay."""
+        self.__inventario = inventario
+        self.__activas = {}
+        for producto in inventario.get_productos():
+            self.revisar(producto)
+
+    def suscribir(self, funcion):
+        self.__oyentes.append(funcion)
+
+    def desuscribir(self, funcion):
+        if funcion in self.__oyentes:
+            self.__oyentes.remove(funcion)
+
+    # ---- Umbrales ----
+    def get_umbralesProducto(self): return dict(self.__porProducto)
+    def get_umbralesCategoria(self): return dict(self.__porCategoria)
+
+    def fijarUmbralProducto(self, codigo, umbral):
+        self.__porProducto[claveCodigo(codigo)] = _validarUmbral(umbral)
+        self.__revisarCodigo(codigo)
+
+    def quitarUmbralProducto(self, codigo):
+        if self.__porProducto.pop(claveCodigo(codigo), None) is not None:
+            self.__revisarCodigo(codigo)
+
+    def fijarUmbralCategoria(self, categoria, umbral):
+        self.__porCategoria[claveCategoria(categoria)] = _validarUmbral(umbral)
+        self.__revisarCategoria(categoria)
+
+    def quitarUmbralCategoria(self, categoria):
+        if self.__porCategoria.pop(claveCategoria(categoria), None) is not None:
+            self.__revisarCategoria(categoria)
+
+    def umbralDe(self, producto):
+        if self.__porProducto:
+            umbral = self.__porProducto.get(claveCodigo(producto.get_codigo()))
+            if umbral is not None:
+                return umbral
+        return self.__porCategoria.get(producto.get_claveCategoria())
+
+    def __revisarCodigo(self, codigo):
+        if self.__inventario is not None:
+            producto = self.__inventario.get_indice("codigos").buscar(codigo)
+            if producto is not None:
+                self.revisar(producto)
+
+    def __revisarCategoria(self, categoria):
+        if self.__inventario is not None:
+            for producto in self.__inventario.get_particionCategoria(categoria) or ():
+                self.revisar(producto)
+
+    # ---- Revisión de un producto ----
+    def revisar(self, producto):
+        """Actualiza la alerta del producto y la devuelve (None si no está en alerta)."""
+        umbral = self.umbralDe(producto)
+        cantidad = producto.get_cantidad()
+        if umbral is None or cantidad > umbral:
+            self.__activas.pop(producto, None)
+            return None
+
+        anterior = self.__activas.get(producto)
+        if anterior is not None and anterior.cantidad == cantidad and anterior.umbral == umbral:
+            return anterior
+        alerta = Alerta(producto.get_codigo(), producto.get_nombre(), producto.get_categoria(),
+                        cantidad, umbral, ahora() if anterior is None else anterior.marca)
+        self.__activas[producto] = alerta
+        if anterior is None:
+            for oyente in self.__oyentes:
+                oyente(alerta)
+        return alerta
+
+    # Avisos del inventario (ver Inventario._stockCambiado / _insertar / _retirar).
+    def stockCambiado(self, producto, anterior, nuevo):
+        if self.__porProducto or self.__porCategoria:
+            self.revisar(producto)
+
+    def productoAgregado(self, producto):
+        if self.__porProducto or self.__porCategoria:
+            self.revisar(producto)
+
+    def productoQuitado(self, producto):
+        self.__activas.pop(producto, None)
+
+    def get_alertas(self):
+        """Alertas activas, en el orden en que se dispararon."""
+        return list(self.__activas.values())
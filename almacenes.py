@@ -0,0 +1,127 @@
+from dominio import InventarioError, HistorialVacioError
+from negocio import AccionTransferencia
+from sistema import Inventario, ImportadorArchivo
+from eventos import datosProducto
+
+# =============================================================================
+# RED DE ALMACENES
+# =============================================================================
+# Cada almacén (ubicación) es un Inventario completo con sus propios índices,
+# reservas e historial: operar en una ubicación cuesta lo mismo sin importar
+# cuántas haya. La red sólo suma lo que cruza ubicaciones: stock total por
+# código (una búsqueda O(1) en el índice de códigos de cada almacén) y
+# transferencias, que tienen su propio historial y se deshacen desde la red.
+#
+# Para trabajo pesado por almacén (importar archivos, recorrer todo el stock)
+# cada proceso recibe filas planas (codigo, nombre, categoria, cantidad,
+# precio) en lugar del Inventario, que no viaja bien entre procesos.
+
+def filaProducto(producto):
+    return (producto.get_codigo(),) + datosProducto(producto)
+
+
+def _leerArchivo(ruta):
+    # Corre en un proceso aparte: devuelve filas validadas y el reporte.
+    imp = ImportadorArchivo()
+    filas = list(imp.filasValidas(ruta))
+    return filas, imp.get_reporte()
+
+
+class RedAlmacenes:
+    def __init__(self, ubicaciones=()):
+        self.__almacenes = {}
+        self.__historialTransferencias = []
+        for ubicacion in ubicaciones:
+            self.agregarAlmacen(ubicacion)
+
+    def __len__(self):
+        return len(self.__almacenes)
+
+    def agregarAlmacen(self, ubicacion):
+        ubicacion = ubicacion.strip()
+        if not ubicacion:
+            raise ValueError("La ubicación no puede estar vacía.")
+        if ubicacion in self.__almacenes:
+            raise InventarioError(f"El almacén '{ubicacion}' ya existe.")
+        self.__almacenes[ubicacion] = inventario = Inventario()
+        return inventario
+
+    def get_almacen(self, ubicacion):
+        try:
+            return self.__almacenes[ubicacion]
+        except KeyError:
+            raise InventarioError(f"No existe el almacén '{ubicacion}'.") from None
+
+    def get_ubicaciones(self):
+        return list(self.__almacenes)
+
+    # ---- Consultas entre almacenes ----
+    def stockPorUbicacion(self, codigo):
+        stock = {}
+        for ubicacion, inventario in self.__almacenes.items():
+            producto = inventario.get_indice("codigos").buscar(codigo)
+            if producto is not None:
+                stock[ubicacion] = producto.get_cantidad()
+        return stock
+
+    def stockTotal(self, codigo):
+        return sum(self.stockPorUbicacion(codigo).values())
+
+    def disponibleTotal(self, codigo):
+        total = 0
+        for inventario in self.__almacenes.values():
+            producto = inventario.get_indice("codigos").buscar(codigo)
+            if producto is not None:
+                total += producto.get_disponible()
+        return total
+
+    # ---- Transferencias ----
+    def transferir(self, codigo, origen, destino, cantidad):
+        if origen == destino:
+            raise ValueError("El origen y el destino deben ser distintos.")
+        if cantidad <= 0:
+            raise ValueError("La cantidad a transferir debe ser mayor a 0.")
+        accion = AccionTransferencia(codigo, origen, destino, cantidad)
+        accion.ejecutar(self)
+        self.__historialTransferencias.append(accion)
+
+    def get_ultima_transferencia(self):
+        if self.__historialTransferencias:
+            return self.__historialTransferencias[-1]
+        return None
+
+    def revertirUltimaTransferencia(self):
+        if not self.__historialTransferencias:
+            raise HistorialVacioError("No existen transferencias previas para deshacer.")
+        self.__historialTransferencias[-1].revertir(self)
+        self.__historialTransferencias.pop()
+        return True
+
+    # ---- Procesamiento en paralelo ----
+    def instantanea(self):
+        return {ubicacion: [filaProducto(p) for p in inventario.get_productos()]
+                for ubicacion, inventario in self.__almacenes.items()}
+
+    def procesarEnParalelo(self, funcion, procesos=None):
+        """Aplica funcion(filas) a cada almacén; funcion debe poder importarse desde otro proceso."""
+        instantanea = self.instantanea()
+        resultados = _mapear(funcion, list(instantanea.values()), procesos)
+        return dict(zip(instantanea, resultados))
+
+    def importarEnParalelo(self, rutas, procesos=None):
+        # rutas: {ubicacion: ruta}. La lectura y validación de cada archivo se
+        # hace en otro proceso; los productos se crean e indexan aquí.
+        for ubicacion in rutas:
+            self.get_almacen(ubicacion)
+        leidos = _mapear(_leerArchivo, list(rutas.values()), procesos)
+        return {ubicacion: self.__almacenes[ubicacion].importarFilas(filas, reporte)
+                for ubicacion, (filas, reporte) in zip(rutas, leidos)}
+
+
+def _mapear(funcion, argumentos, procesos):
+    # Con una sola tarea (o un solo proceso) no vale la pena lanzar procesos.
+    if len(argumentos) < 2 or procesos == 1:
+        return [funcion(a) for a in argumentos]
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=procesos) as ejecutor:
+        return list(ejecutor.map(funcion, argumentos))
@@ -0,0 +1,39 @@
+# Tiempo de arranque en frío de la consola: importar el punto de entrada y
+# construir InterfazConsola (sin entrar al menú). Cada medición es un proceso
+# nuevo, así que incluye el arranque del intérprete.
+#
+# Uso, desde la raíz del proyecto:
+#     python -m benchmarks.bench_arranque [repeticiones]
+
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CODIGO = "import kiputech_system; kiputech_system.InterfazConsola()"
+
+
+def medir_una_vez(codigo):
+    inicio = time.perf_counter()
+    subprocess.run([sys.executable, "-c", codigo], cwd=RAIZ, check=True)
+    return time.perf_counter() - inicio
+
+
+def main():
+    repeticiones = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+
+    base = [medir_una_vez("pass") for _ in range(repeticiones)]
+    app = [medir_una_vez(CODIGO) for _ in range(repeticiones)]
+
+    mediana_base = statistics.median(base) * 1000
+    mediana_app = statistics.median(app) * 1000
+    print(f"Intérprete vacío : {mediana_base:7.1f} ms (mediana de {repeticiones})")
+    print(f"Consola Kiputech : {mediana_app:7.1f} ms (mediana de {repeticiones})")
+    print(f"Costo propio     : {mediana_app - mediana_base:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# Rendimiento del importador CSV (validación + construcción de productos),
+# con un archivo estándar (UTF-8, comas) y uno como los que exporta el ERP
+# (Windows-1252, punto y coma, columnas en otro orden, decimales con coma).
+# También compara la lectura en bloques de ingesta.py con el csv.reader
+# sobre un archivo de texto.
+#
+# Uso, desde la raíz del proyecto:
+#     python -m benchmarks.bench_importacion [filas] [porcentaje_invalidas]
+
+import csv
+import os
+import random
+import sys
+import tempfile
+import time
+
+import ingesta
+from sistema import ImportadorArchivo
+
+
+def generar_csv(ruta, filas, porcentaje_invalidas, semilla=0):
+    azar = random.Random(semilla)
+    invalidas = [
+        lambda i: f"B{i},Roto {i},Hogar\n",
+        lambda i: f"B{i},Roto {i},Hogar,abc,10.0\n",
+        lambda i: f"B{i},Roto {i},Hogar,5,precio\n",
+        lambda i: f"B{i},Roto {i},Hogar,-3,10.0\n",
+    ]
+    with open(ruta, "w", encoding="utf-8") as f:
+        f.write("codigo,nombre,categoria,cantidad,precio\n")
+        for i in range(filas):
+            if azar.random() * 100 < porcentaje_invalidas:
+                f.write(azar.choice(invalidas)(i))
+            else:
+                f.write(f"B{i},Producto {i},Categoria {i % 20},{azar.randint(0, 500)},{azar.uniform(1, 3000):.2f}\n")
+
+
+def generar_csv_erp(ruta, filas, semilla=0):
+    azar = random.Random(semilla)
+    with open(ruta, "w", encoding="cp1252", newline="") as f:
+        f.write("Descripción;Stock;Código;Precio Unitario;Familia\r\n")
+        for i in range(filas):
+            precio = f"{azar.uniform(1, 3000):.2f}".replace(".", ",")
+            f.write(f"Artículo {i};{azar.randint(0, 500)};E{i};{precio};Línea {i % 20}\r\n")
+
+
+def medir_lectura(ruta, repeticiones=3):
+    texto = bloques = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        with open(ruta, encoding="utf-8", newline="") as f:
+            for _ in csv.reader(f):
+                pass
+        transcurrido = time.perf_counter() - inicio
+        texto = transcurrido if texto is None else min(texto, transcurrido)
+
+        inicio = time.perf_counter()
+        for _ in ingesta.leerRegistros(ruta, ingesta.detectarFormato(ruta)):
+            pass
+        transcurrido = time.perf_counter() - inicio
+        bloques = transcurrido if bloques is None else min(bloques, transcurrido)
+    return texto, bloques
+
+
+def medir(ruta, repeticiones=3):
+    mejor = None
+    for _ in range(repeticiones):
+        imp = ImportadorArchivo()
+        inicio = time.perf_counter()
+        imp.importarInventario(ruta)
+        transcurrido = time.perf_counter() - inicio
+        mejor = transcurrido if mejor is None else min(mejor, transcurrido)
+    return mejor, imp.get_reporte()
+
+
+def main():
+    filas = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    porcentaje = float(sys.argv[2]) if len(sys.argv) > 2 else 5.0
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        ruta = os.path.join(carpeta, "inventario.csv")
+        generar_csv(ruta, filas, porcentaje)
+        segundos, reporte = medir(ruta)
+        texto, bloques = medir_lectura(ruta)
+
+        ruta_erp = os.path.join(carpeta, "erp.csv")
+        generar_csv_erp(ruta_erp, filas)
+        segundos_erp, reporte_erp = medir(ruta_erp)
+
+    print(f"Filas           : {filas}")
+    print(f"Aceptadas       : {reporte.get_aceptadas()}")
+    print(f"Rechazadas      : {reporte.get_totalRechazadas()}")
+    print(f"Tiempo (mejor)  : {segundos:.3f} s")
+    print(f"Filas/segundo   : {filas / segundos:,.0f}")
+    print()
+    print(f"Archivo ERP     : {reporte_erp.get_aceptadas()} aceptadas, {reporte_erp.get_totalRechazadas()} rechazadas")
+    print(f"Tiempo (mejor)  : {segundos_erp:.3f} s")
+    print(f"Filas/segundo   : {filas / segundos_erp:,.0f}")
+    print()
+    print(f"Lectura csv.reader sobre texto : {texto:.3f} s")
+    print(f"Lectura en bloques (ingesta)   : {bloques:.3f} s")
+
+if __name__ == "__main__":
+    main()
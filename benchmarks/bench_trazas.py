@@ -0,0 +1,29 @@
+# Reproduce una traza de operaciones (grabada o sintética) y muestra
+# rendimiento y percentiles de latencia por tipo de operación.
+#
+# Uso, desde la raíz del proyecto:
+#     python -m benchmarks.bench_trazas [operaciones] [productos]
+#     python -m benchmarks.bench_trazas --traza sesion.jsonl [velocidad]
+
+import sys
+
+from trazas import Traza, generarTraza, reproducir
+
+
+def main():
+    argumentos = sys.argv[1:]
+    if argumentos and argumentos[0] == "--traza":
+        traza = Traza.cargar(argumentos[1])
+        velocidad = float(argumentos[2]) if len(argumentos) > 2 else None
+    else:
+        operaciones = int(argumentos[0]) if argumentos else 20000
+        productos = int(argumentos[1]) if len(argumentos) > 1 else 5000
+        traza = generarTraza(operaciones, productos)
+        velocidad = None
+
+    print(f"Traza: {len(traza.inicial)} productos iniciales, {len(traza)} operaciones")
+    print(reproducir(traza, velocidad=velocidad).resumen())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import threading
+from collections import OrderedDict
+
+# =============================================================================
+# CACHÉ DE VISTAS DERIVADAS
+# =============================================================================
+# Guarda resultados de búsquedas y ordenamientos junto con la versión del
+# inventario con la que se calcularon. Cada cambio hecho por una acción
+# incrementa esa versión, de modo que una entrada vieja nunca se devuelve:
+# se detecta al leerla y se recalcula. Al llenarse se desaloja la entrada
+# usada hace más tiempo (LRU).
+#
+# Varios hilos pueden consultar a la vez: las lecturas y escrituras del
+# diccionario van bajo un candado propio; el cálculo de un valor, no.
+
+def claveEstrategia(estrategia):
+    # Dos instancias de la misma estrategia con los mismos parámetros
+    # producen el mismo resultado y comparten entrada.
+    return (type(estrategia), tuple(sorted((k, _valorClave(v)) for k, v in vars(estrategia).items())))
+
+
+def _valorClave(valor):
+    # Un criterio compuesto guarda otros criterios: se comparan por sus
+    # parámetros, no por identidad.
+    if isinstance(valor, tuple):
+        return tuple(map(_valorClave, valor))
+    if hasattr(valor, "__dict__") and not callable(valor):
+        return claveEstrategia(valor)
+    return valor
+
+
+class CacheVistas:
+    def __init__(self, capacidad=128):
+        if capacidad <= 0:
+            raise ValueError("La capacidad del caché debe ser mayor a 0.")
+        self.__capacidad = capacidad
+        self.__entradas = OrderedDict()
+        self.__aciertos = 0
+        self.__fallos = 0
+        self.__desalojos = 0
+        self.__candado = threading.Lock()
+
+    def __len__(self):
+        return len(self.__entradas)
+
+    def obtener(self, clave, version, calcular):
+        with self.__candado:
+            entrada = self.__entradas.get(clave)
+            if entrada is not None and entrada[0] == version:
+                self.__aciertos += 1
+                self.__entradas.move_to_end(clave)
+                return entrada[1]
+            self.__fallos += 1
+
+        valor = calcular()
+        with self.__candado:
+            self.__entradas[clave] = (version, valor)
+            self.__entradas.move_to_end(clave)
+            if len(self.__entradas) > self.__capacidad:
+                self.__entradas.popitem(last=False)
+                self.__desalojos += 1
+        return valor
+
+    def limpiar(self):
+        with self.__candado:
+            self.__entradas.clear()
+
+    def get_estadisticas(self):
+        consultas = self.__aciertos + self.__fallos
+        return {
+            "aciertos": self.__aciertos,
+            "fallos": self.__fallos,
+            "desalojos": self.__desalojos,
+            "entradas": len(self.__entradas),
+            "tasa_aciertos": self.__aciertos / consultas if consultas else 0.0,
+        }
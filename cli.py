@@ -0,0 +1,238 @@
+import argparse
+import os
+import sys
+import time
+
+from dominio import InventarioError, formatearCentimos
+from negocio import CRITERIOS, crearCriterio
+from sistema import Inventario, exportarProductos
+
+# =============================================================================
+# LÍNEA DE COMANDOS SIN MENÚS
+# =============================================================================
+# Para tareas programadas (cron, scripts): cada ejecución carga el inventario
+# guardado, corre un subcomando y, si el subcomando modificó algo, lo vuelve a
+# guardar. El estado (productos, historial para deshacer, huellas de
+# sincronización y reservas activas) vive en un archivo pickle; se escribe en
+# un temporal y se reemplaza de una vez, así una ejecución interrumpida no lo
+# deja a medias.
+#
+#   python cli.py [--estado RUTA] importar inventario.csv
+#   python cli.py descontar ventas.csv          (líneas "codigo,cantidad"; "-" lee stdin)
+#   python cli.py consultar --categoria Hogar --orden precio-desc --limite 20
+#   python cli.py consultar --orden categoria,stock-asc
+#   python cli.py deshacer -n 3
+#   python cli.py estadisticas
+#   python cli.py exportar copia.csv
+#
+# Los resultados van a la salida estándar; los tiempos de cada etapa y los
+# errores, a la de errores. Código de salida: 0 bien, 1 error, 2 si un lote de
+# descuentos tuvo líneas rechazadas.
+
+VARIABLE_ESTADO = "KIPUTECH_ESTADO"
+ESTADO_POR_DEFECTO = "kiputech.estado"
+HISTORIAL_POR_DEFECTO = 1000
+
+
+# =============================================================================
+# ESTADO PERSISTENTE
+# =============================================================================
+
+def cargarInventario(ruta):
+    if not os.path.exists(ruta):
+        return Inventario()
+    import pickle
+    with open(ruta, mode='rb') as f:
+        return Inventario.desdeEstadoPersistente(pickle.load(f))
+
+
+def guardarInventario(inventario, ruta, maxHistorial=HISTORIAL_POR_DEFECTO):
+    import pickle
+    temporal = f"{ruta}.tmp"
+    with open(temporal, mode='wb') as f:
+        pickle.dump(inventario.get_estadoPersistente(maxHistorial), f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporal, ruta)
+
+
+# =============================================================================
+# SUBCOMANDOS
+# =============================================================================
+# Cada uno recibe el inventario y los argumentos y devuelve el código de
+# salida. modifica=True indica que hay que guardar el estado al terminar.
+
+def comandoImportar(inventario, args):
+    if args.sincronizar:
+        resultado = inventario.sincronizarDesdeArchivo(args.archivo, args.eliminar_ausentes)
+        print(f"Agregados: {resultado.get_agregados()}  Actualizados: {resultado.get_actualizados()}  "
+              f"Sin cambios: {resultado.get_sinCambios()}  Ausentes: {resultado.get_ausentes()}  "
+              f"Eliminados: {resultado.get_eliminados()}")
+    else:
+        agregados, repetidos = inventario.importarDesdeArchivo(args.archivo)
+        print(f"Agregados: {agregados}  Repetidos: {repetidos}")
+    reporte = inventario.get_reporteImportacion()
+    if reporte is not None and reporte.get_totalRechazadas():
+        print(reporte.resumen(), file=sys.stderr)
+    return 0
+
+
+def comandoExportar(inventario, args):
+    exportarProductos(inventario.get_productos(), args.archivo)
+    print(f"Exportados: {inventario.get_totalProductos()}")
+    return 0
+
+
+def _lineasDescuento(ruta):
+    import csv
+    if ruta == "-":
+        yield from enumerate(csv.reader(sys.stdin), start=1)
+        return
+    with open(ruta, mode='r', encoding='utf-8', newline='') as f:
+        yield from enumerate(csv.reader(f), start=1)
+
+
+def comandoDescontar(inventario, args):
+    codigos = inventario.get_indice("codigos")
+    aplicados = rechazados = unidades = 0
+    for linea, fila in _lineasDescuento(args.archivo):
+        if not fila or not "".join(fila).strip():
+            continue
+        try:
+            codigo, cantidad = fila[0], fila[1]
+            if not cantidad.strip().isdecimal():
+                raise ValueError("La cantidad debe ser un número entero.")
+            cantidad = int(cantidad)
+            if cantidad <= 0:
+                raise ValueError("La cantidad debe ser mayor que cero.")
+            producto = codigos.buscar(codigo)
+            if producto is None:
+                raise InventarioError(f"El código '{codigo.strip()}' no existe en el inventario.")
+            inventario.descontarStock(producto, cantidad)
+        except IndexError:
+            rechazados += 1
+            print(f"Línea {linea}: se esperaba 'codigo,cantidad'.", file=sys.stderr)
+        except (InventarioError, ValueError) as e:
+            rechazados += 1
+            print(f"Línea {linea}: {e}", file=sys.stderr)
+        else:
+            aplicados += 1
+            unidades += cantidad
+    print(f"Descuentos aplicados: {aplicados} ({unidades} uds.)  Rechazados: {rechazados}")
+    return 2 if rechazados else 0
+
+
+def comandoConsultar(inventario, args):
+    from consultas import Consulta
+    criterio = crearCriterio(args.orden) if args.orden else None
+    consulta = Consulta(categoria=args.categoria, precioMin=args.precio_min, precioMax=args.precio_max,
+                        stockMin=args.stock_min, stockMax=args.stock_max, nombre=args.nombre,
+                        criterio=criterio, limite=args.limite, desde=args.desde)
+    import csv
+    escritor = csv.writer(sys.stdout)
+    escritor.writerow(("codigo", "nombre", "categoria", "cantidad", "precio"))
+    resultado = inventario.consultar(consulta)
+    escritor.writerows((p.get_codigo(), p.get_nombre(), p.get_categoria(), p.get_cantidad(),
+                        formatearCentimos(p.get_centimos())) for p in resultado)
+    print(f"{len(resultado)} productos", file=sys.stderr)
+    return 0
+
+
+def comandoDeshacer(inventario, args):
+    for _ in range(args.n):
+        accion = inventario.get_ultima_accion()
+        if accion is None:
+            # Lo ya deshecho se guarda igual; sólo se avisa que no hay más.
+            print("No existen acciones previas para deshacer.", file=sys.stderr)
+            return 1
+        inventario.revertirUltimaAccion()
+        print(f"Deshecho: {accion.get_descripcion()}")
+    return 0
+
+
+def comandoEstadisticas(inventario, args):
+    categorias = inventario.resumenCategorias()
+    unidades = sum(c.get_unidades() for c in categorias)
+    valor = sum(c.get_valorCentimos() for c in categorias)
+    print(f"Productos : {inventario.get_totalProductos()}")
+    print(f"Unidades  : {unidades}")
+    print(f"Valor     : {formatearCentimos(valor)}")
+    print(f"{'Categoría':<20} {'Productos':>10} {'Unidades':>10} {'Valor':>16}")
+    for c in categorias:
+        print(f"{c.get_nombre():<20} {c.get_cantidadProductos():>10} {c.get_unidades():>10} "
+              f"{formatearCentimos(c.get_valorCentimos()):>16}")
+    return 0
+
+
+# =============================================================================
+# ARGUMENTOS Y EJECUCIÓN
+# =============================================================================
+
+def crearParser():
+    parser = argparse.ArgumentParser(prog="cli.py", description="Inventario Kiputech sin menús interactivos.")
+    parser.add_argument("--estado", default=os.environ.get(VARIABLE_ESTADO, ESTADO_POR_DEFECTO),
+                        help=f"archivo de estado (por defecto ${VARIABLE_ESTADO} o {ESTADO_POR_DEFECTO})")
+    parser.add_argument("--historial", type=int, default=HISTORIAL_POR_DEFECTO,
+                        help="acciones del historial que se conservan para deshacer")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p = sub.add_parser("importar", aliases=["import"], help="importar o sincronizar un CSV")
+    p.add_argument("archivo")
+    p.add_argument("--sincronizar", action="store_true", help="actualizar los existentes en lugar de omitirlos")
+    p.add_argument("--eliminar-ausentes", action="store_true", help="con --sincronizar, quitar los que no vienen")
+    p.set_defaults(ejecutar=comandoImportar, modifica=True)
+
+    p = sub.add_parser("exportar", aliases=["export"], help="escribir el inventario en un CSV")
+    p.add_argument("archivo")
+    p.set_defaults(ejecutar=comandoExportar, modifica=False)
+
+    p = sub.add_parser("descontar", aliases=["deduct-batch"], help="descontar stock desde líneas codigo,cantidad")
+    p.add_argument("archivo", help="CSV con codigo,cantidad o '-' para la entrada estándar")
+    p.set_defaults(ejecutar=comandoDescontar, modifica=True)
+
+    p = sub.add_parser("consultar", aliases=["query"], help="filtrar y ordenar productos (salida CSV)")
+    p.add_argument("--categoria")
+    p.add_argument("--nombre")
+    p.add_argument("--precio-min", type=float)
+    p.add_argument("--precio-max", type=float)
+    p.add_argument("--stock-min", type=int)
+    p.add_argument("--stock-max", type=int)
+    p.add_argument("--orden", help=f"uno o varios separados por coma: {', '.join(CRITERIOS)}")
+    p.add_argument("--limite", type=int)
+    p.add_argument("--desde", type=int, default=0)
+    p.set_defaults(ejecutar=comandoConsultar, modifica=False)
+
+    p = sub.add_parser("deshacer", aliases=["undo"], help="deshacer las últimas acciones")
+    p.add_argument("-n", type=int, default=1, help="cantidad de acciones (por defecto 1)")
+    p.set_defaults(ejecutar=comandoDeshacer, modifica=True)
+
+    p = sub.add_parser("estadisticas", aliases=["stats"], help="totales por categoría")
+    p.set_defaults(ejecutar=comandoEstadisticas, modifica=False)
+    return parser
+
+
+def main(argumentos=None):
+    args = crearParser().parse_args(argumentos)
+    tiempos = []
+    inicio = time.perf_counter()
+    try:
+        inventario = cargarInventario(args.estado)
+        tiempos.append(("carga", time.perf_counter() - inicio))
+
+        inicio = time.perf_counter()
+        try:
+            codigo = args.ejecutar(inventario, args)
+        finally:
+            tiempos.append((args.comando, time.perf_counter() - inicio))
+
+        if args.modifica:
+            inicio = time.perf_counter()
+            guardarInventario(inventario, args.estado, args.historial)
+            tiempos.append(("guardado", time.perf_counter() - inicio))
+    except (InventarioError, ValueError, OSError) as e:
+        print(f"[ERROR] {e}", file=sys.stderr)
+        codigo = 1
+    print("Tiempos: " + ", ".join(f"{etapa} {segundos * 1000:.1f} ms" for etapa, segundos in tiempos), file=sys.stderr)
+    return codigo
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,157 @@
+import heapq
+import math
+from decimal import Decimal
+from itertools import islice
+from indices import claveCategoria
+
+# =============================================================================
+# MOTOR DE CONSULTAS
+# =============================================================================
+# Una Consulta combina filtros (categoría, rango de precio, rango de stock y
+# subcadena del nombre) con un criterio de orden, un límite y un
+# desplazamiento. El planificador elige como fuente de candidatos el índice
+# más selectivo del inventario y el resto se resuelve en una sola pasada:
+# filtro + orden + límite se fusionan con heapq en lugar de ordenar todo.
+#
+# El rango de precio se pide en unidades pero se compara en céntimos enteros,
+# como se guardan los precios: el mínimo se redondea hacia arriba y el máximo
+# hacia abajo, así ningún precio fuera del rango pedido entra por redondeo.
+
+def _centimos(valor, redondeo):
+    if valor is None:
+        return None
+    decimal = Decimal(repr(valor)) if isinstance(valor, float) else Decimal(valor)
+    return redondeo(decimal * 100)
+
+
+class PlanConsulta:
+    def __init__(self, indice, estimacion):
+        self.__indice = indice
+        self.__estimacion = estimacion
+
+    def get_indice(self): return self.__indice
+    def get_estimacion(self): return self.__estimacion
+
+    def describir(self):
+        origen = self.__indice.nombre if self.__indice else "recorrido completo"
+        return f"{origen} (~{self.__estimacion} candidatos)"
+
+
+class Consulta:
+    def __init__(self, categoria=None, precioMin=None, precioMax=None, stockMin=None, stockMax=None,
+                 nombre=None, criterio=None, limite=None, desde=0):
+        if limite is not None and limite < 0:
+            raise ValueError("El límite no puede ser negativo.")
+        if desde < 0:
+            raise ValueError("El desplazamiento no puede ser negativo.")
+
+        self.__categoria = claveCategoria(categoria) if categoria else None
+        self.__precioMin = precioMin
+        self.__precioMax = precioMax
+        self.__centimosMin = _centimos(precioMin, math.ceil)
+        self.__centimosMax = _centimos(precioMax, math.floor)
+        self.__stockMin = stockMin
+        self.__stockMax = stockMax
+        self.__nombre = nombre.lower() if nombre else None
+        self.__criterio = criterio
+        self.__limite = limite
+        self.__desde = desde
+
+    def get_categoria(self): return self.__categoria
+    def get_rangoPrecio(self): return self.__precioMin, self.__precioMax
+    def get_rangoCentimos(self): return self.__centimosMin, self.__centimosMax
+    def get_rangoStock(self): return self.__stockMin, self.__stockMax
+    def get_nombre(self): return self.__nombre
+    def get_criterio(self): return self.__criterio
+
+    def planificar(self, inventario, estado=None):
+        estado = inventario._get_estado() if estado is None else estado
+        total = len(estado.almacen)
+        mejor = PlanConsulta(None, total)
+        for indice in estado.get_indices():
+            estimacion = indice.estimar(self)
+            # Un índice que ya entrega el orden pedido gana los empates: evita
+            # ordenar y permite cortar en cuanto se alcanza el límite.
+            ordenado = self.__criterio is not None and indice.entregaOrdenadoPor(self.__criterio)
+            if estimacion is None:
+                if not ordenado:
+                    continue
+                estimacion = total
+            if estimacion < mejor.get_estimacion() or (ordenado and estimacion == mejor.get_estimacion()):
+                mejor = PlanConsulta(indice, estimacion)
+        return mejor
+
+    def __compilarPredicado(self, cubiertos):
+        condiciones = []
+        if self.__categoria is not None and "categoria" not in cubiertos:
+            categoria = self.__categoria
+            condiciones.append(lambda p: p.get_claveCategoria() == categoria)
+        if "precio" not in cubiertos:
+            if self.__centimosMin is not None:
+                minimo = self.__centimosMin
+                condiciones.append(lambda p: p.get_centimos() >= minimo)
+            if self.__centimosMax is not None:
+                maximo = self.__centimosMax
+                condiciones.append(lambda p: p.get_centimos() <= maximo)
+        if self.__stockMin is not None:
+            minimo_stock = self.__stockMin
+            condiciones.append(lambda p: p.get_cantidad() >= minimo_stock)
+        if self.__stockMax is not None:
+            maximo_stock = self.__stockMax
+            condiciones.append(lambda p: p.get_cantidad() <= maximo_stock)
+        if self.__nombre is not None:
+            texto = self.__nombre
+            condiciones.append(lambda p: texto in p.get_claveNombre())
+
+        if not condiciones:
+            return None
+        if len(condiciones) == 1:
+            return condiciones[0]
+        return lambda p: all(c(p) for c in condiciones)
+
+    def ejecutar(self, inventario):
+        # Índice y orden de llegada salen del mismo estado, tomado una vez.
+        estado = inventario._get_estado()
+        plan = self.planificar(inventario, estado)
+        indice = plan.get_indice()
+
+        if indice is None:
+            fuente = inventario.get_productos()
+            cubiertos = set()
+        else:
+            fuente = indice.candidatos(self)
+            cubiertos = indice.cubre()
+
+        predicado = self.__compilarPredicado(cubiertos)
+        candidatos = fuente if predicado is None else filter(predicado, fuente)
+
+        criterio = self.__criterio
+        fin = None if self.__limite is None else self.__desde + self.__limite
+
+        if indice is not None and criterio is not None and indice.entregaOrdenadoPor(criterio):
+            return list(islice(candidatos, self.__desde, fin))
+
+        # Los índices entregan en su propio orden; el orden de llegada al
+        # inventario desempata para que el resultado no dependa del plan.
+        if indice is None:
+            orden = None
+        else:
+            llegada = estado.orden
+            orden = lambda p: llegada[id(p)]
+        if criterio is None:
+            if orden is None:
+                return list(islice(candidatos, self.__desde, fin))
+            clave, descendente = orden, False
+        elif orden is None:
+            clave, descendente = criterio.compilarClave(), criterio.descendente
+        elif criterio.descendente:
+            clave_criterio = criterio.compilarClave()
+            clave, descendente = (lambda p: (clave_criterio(p), -orden(p))), True
+        else:
+            clave_criterio = criterio.compilarClave()
+            clave, descendente = (lambda p: (clave_criterio(p), orden(p))), False
+
+        if fin is None:
+            return sorted(candidatos, key=clave, reverse=descendente)[self.__desde:]
+        seleccion = heapq.nlargest if descendente else heapq.nsmallest
+        return seleccion(fin, candidatos, key=clave)[self.__desde:]
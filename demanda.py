@@ -0,0 +1,159 @@
+import math
+import operator
+from array import array
+from collections import namedtuple
+from reloj import ahora
+
+# =============================================================================
+# DEMANDA Y REPOSICIÓN
+# =============================================================================
+# Cada venta (descuento de stock o reserva confirmada) se suma a la demanda
+# del producto en el período en curso; deshacerla la resta del período en que
+# ocurrió. Los períodos forman un anillo de `periodos` cubetas, y cada cubeta
+# es un array('d') con una posición por producto (el mismo orden en todas):
+# las operaciones sobre "todos los productos" son operaciones entre arreglos
+# completos, no un recorrido producto por producto.
+#
+# Al cerrarse un período se actualiza el nivel del suavizado exponencial
+#     nivel = alfa * demanda_del_periodo + (1 - alfa) * nivel
+# para todos los productos a la vez. El primer período cerrado no tiene nivel
+# anterior y lo siembra con su demanda tal cual (peso 1 en lugar de alfa); las
+# correcciones posteriores de ese período usan el mismo peso. El promedio
+# móvil se calcula sobre los últimos períodos cerrados que siguen en el anillo.
+
+Reposicion = namedtuple("Reposicion", "codigo disponible demandaPorPeriodo sugerido periodosRestantes")
+
+MICROSEGUNDOS = 1_000_000
+
+
+def _ceros(n):
+    return array('d', bytes(8 * n))
+
+
+class RegistroDemanda:
+    def __init__(self, periodos=28, duracion=86400, alfa=0.3, reloj=ahora):
+        if periodos < 2:
+            raise ValueError("Se necesitan al menos 2 períodos.")
+        if not 0 < alfa <= 1:
+            raise ValueError("alfa debe estar entre 0 y 1.")
+        self.__periodos = periodos
+        self.__duracion = int(duracion * MICROSEGUNDOS)
+        self.__alfa = alfa
+        self.__reloj = reloj
+        self.__posiciones = {}
+        self.__codigos = []
+        self.__cubetas = [array('d') for _ in range(periodos)]
+        self.__nivel = array('d')
+        self.__actual = None
+        self.__semilla = None  # período que sembró el nivel
+        self.__cerrados = 0
+
+    def __len__(self):
+        return len(self.__codigos)
+
+    def get_codigos(self):
+        return list(self.__codigos)
+
+    def get_periodosCerrados(self):
+        return self.__cerrados
+
+    def registrar(self, codigo, cantidad, marca=None):
+        ahora_ = self.__reloj()
+        periodo = (ahora_ if marca is None else marca) // self.__duracion
+        self.avanzar(ahora_)
+        atraso = self.__actual - periodo
+        if atraso >= self.__periodos or atraso < 0:
+            return  # Fuera del anillo: ya no influye en los pronósticos.
+
+        posicion = self.__posiciones.get(codigo)
+        if posicion is None:
+            posicion = self.__posiciones[codigo] = len(self.__codigos)
+            self.__codigos.append(codigo)
+            for cubeta in self.__cubetas:
+                cubeta.append(0.0)
+            self.__nivel.append(0.0)
+
+        self.__cubetas[periodo % self.__periodos][posicion] += cantidad
+        if atraso > 0:
+            # Corrección de un período ya cerrado (p. ej. se deshizo una venta
+            # de ayer): su efecto en el nivel se fue atenuando período a período.
+            # Un período anterior a la semilla nunca entró en el nivel.
+            if self.__semilla is None or periodo < self.__semilla:
+                return
+            alfa = self.__alfa
+            peso = 1 if periodo == self.__semilla else alfa
+            self.__nivel[posicion] += peso * (1 - alfa) ** (atraso - 1) * cantidad
+
+    def avanzar(self, marca=None):
+        """Cierra los períodos transcurridos hasta `marca` (por defecto, ahora)."""
+        periodo = (self.__reloj() if marca is None else marca) // self.__duracion
+        if self.__actual is None:
+            self.__actual = periodo
+            return
+        pasos = periodo - self.__actual
+        if pasos <= 0:
+            return
+
+        n = len(self.__codigos)
+        alfa = self.__alfa
+        cerrada = self.__cubetas[self.__actual % self.__periodos]
+        if self.__cerrados == 0:
+            self.__nivel = array('d', cerrada)
+            self.__semilla = self.__actual
+        else:
+            self.__nivel = array('d', map(lambda x, l: alfa * x + (1 - alfa) * l, cerrada, self.__nivel))
+        if pasos > 1:
+            # Los períodos sin ventas sólo atenúan el nivel.
+            factor = (1 - alfa) ** (pasos - 1)
+            self.__nivel = array('d', map(factor.__mul__, self.__nivel))
+
+        for i in range(1, min(pasos, self.__periodos) + 1):
+            self.__cubetas[(self.__actual + i) % self.__periodos] = _ceros(n)
+        self.__actual = periodo
+        self.__cerrados += pasos
+
+    # ---- Pronósticos (demanda esperada por período, un valor por código) ----
+    def __ultimasCerradas(self, cantidad):
+        disponibles = min(self.__cerrados, self.__periodos - 1)
+        cantidad = disponibles if cantidad is None else min(cantidad, disponibles)
+        return [self.__cubetas[(self.__actual - j) % self.__periodos] for j in range(1, cantidad + 1)]
+
+    def promedioMovil(self, ventana=None):
+        self.avanzar()
+        cubetas = self.__ultimasCerradas(ventana)
+        if not cubetas:
+            return _ceros(len(self.__codigos))
+        total = cubetas[0]
+        for cubeta in cubetas[1:]:
+            total = array('d', map(operator.add, total, cubeta))
+        k = len(cubetas)
+        return array('d', (x / k for x in total))
+
+    def suavizadoExponencial(self):
+        self.avanzar()
+        return array('d', self.__nivel)
+
+    def pronostico(self, metodo="suavizado", ventana=None):
+        if metodo == "suavizado":
+            return self.suavizadoExponencial()
+        if metodo == "promedio":
+            return self.promedioMovil(ventana)
+        raise ValueError(f"Método de pronóstico desconocido: {metodo}")
+
+    def listaReposicion(self, inventario, cobertura=7, metodo="suavizado", ventana=None):
+        """Productos cuyo disponible no cubre `cobertura` períodos de demanda, más urgentes primero."""
+        demanda = self.pronostico(metodo, ventana)
+        indice = inventario.get_indice("codigos")
+        pedidos = []
+        for codigo, porPeriodo in zip(self.__codigos, demanda):
+            if porPeriodo <= 0:
+                continue
+            producto = indice.buscar(codigo)
+            if producto is None:
+                continue
+            disponible = producto.get_disponible()
+            faltante = porPeriodo * cobertura - disponible
+            if faltante > 0:
+                pedidos.append(Reposicion(codigo, disponible, porPeriodo, math.ceil(faltante), disponible / porPeriodo))
+        pedidos.sort(key=operator.attrgetter("periodosRestantes"))
+        return pedidos
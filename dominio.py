@@ -1,4 +1,7 @@
-from datetime import datetime
+import sys
+import threading
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from reloj import ahora, aFecha
 
 # =============================================================================
 # EXCEPCIONES PERSONALIZADAS
@@ -20,14 +23,116 @@ class HistorialVacioError(InventarioError):
 class ProductoNoEncontradoError(InventarioError):
     pass
 
+class ConflictoVersionError(InventarioError):
+    def __init__(self, codigo, version_esperada, version_actual):
+        self.codigo = codigo
+        self.version_esperada = version_esperada
+        self.version_actual = version_actual
+        super().__init__(f"El producto {codigo} cambió mientras se operaba "
+                         f"(versión esperada {version_esperada}, actual {version_actual}).")
+
+# =============================================================================
+# VALIDACIÓN DE DATOS
+# =============================================================================
+
+# Los precios se guardan como céntimos enteros: sumas y comparaciones son
+# exactas y no acumulan el error de los float.
+
+def aCentimos(precio):
+    """Convierte un precio en unidades (texto, int, float o Decimal) a céntimos, redondeando al céntimo."""
+    if isinstance(precio, int):
+        return precio * 100
+    if isinstance(precio, str):
+        texto = precio.strip()
+        entero, punto, decimales = texto.partition(".")
+        # Camino rápido para lo habitual en los CSV: "12", "12.5", "12.50".
+        if len(decimales) <= 2 and entero.isdecimal() and (decimales.isdecimal() or not decimales):
+            return int(entero + decimales.ljust(2, "0"))
+        precio = texto
+    elif isinstance(precio, float):
+        # repr da el decimal más corto que representa al float: 0.1 -> "0.1".
+        precio = repr(precio)
+    try:
+        valor = Decimal(precio)
+    except (InvalidOperation, TypeError, ValueError):
+        raise ValueError("El precio debe ser un número.") from None
+    if not valor.is_finite():
+        raise ValueError("El precio debe ser un número.")
+    return int((valor * 100).to_integral_value(rounding=ROUND_HALF_UP))
+
+
+def formatearCentimos(centimos):
+    """Céntimos a texto con punto decimal, sin pasar por float: 123450 -> '1234.50'."""
+    signo = "-" if centimos < 0 else ""
+    unidades, resto = divmod(abs(centimos), 100)
+    return f"{signo}{unidades}.{resto:02d}"
+
+
+def validarPrecioStock(precio, stock):
+    """Convierte precio (a céntimos) y stock con las mismas reglas para consola e importación."""
+    centimos = aCentimos(precio)
+    try:
+        stock = int(stock)
+    except ValueError:
+        raise ValueError("El stock debe ser un número entero.") from None
+
+    if centimos < 0 or stock < 0:
+        raise ValueError("Los valores no pueden ser negativos.")
+    return centimos, stock
+
+# =============================================================================
+# TABLA DE CATEGORÍAS
+# =============================================================================
+# Hay unas pocas categorías para miles de productos: cada texto distinto se
+# guarda una sola vez y el producto guarda sólo su número. La clave de
+# comparación (minúsculas) se calcula una vez por categoría, no por consulta.
+
+def claveCategoria(categoria):
+    return categoria.strip().lower()
+
+
+class TablaCategorias:
+    def __init__(self):
+        self.__ids = {}
+        self.__nombres = []
+        self.__claves = []
+        self.__candado = threading.Lock()
+
+    def __len__(self):
+        return len(self.__nombres)
+
+    def id(self, categoria):
+        """Número de la categoría (ya sin espacios en los extremos); la registra si es nueva."""
+        numero = self.__ids.get(categoria)
+        if numero is None:
+            with self.__candado:
+                numero = self.__ids.get(categoria)
+                if numero is None:
+                    numero = len(self.__nombres)
+                    self.__nombres.append(sys.intern(categoria))
+                    self.__claves.append(sys.intern(claveCategoria(categoria)))
+                    self.__ids[self.__nombres[numero]] = numero
+        return numero
+
+    def nombre(self, numero): return self.__nombres[numero]
+    def clave(self, numero): return self.__claves[numero]
+
+
+CATEGORIAS = TablaCategorias()
+
 # =============================================================================
 # CLASE PRODUCTO
 # =============================================================================
 
 class Producto:
     _contador_id = 0
+    # Sin __dict__ por instancia: con cientos de miles de productos en memoria
+    # es la mayor parte de lo que ocupa cada uno.
+    __slots__ = ("__codigo", "__nombre", "__claveNombre", "__idCategoria", "__cantidad", "__centimos",
+                 "__reservado", "__version", "__creado", "__modificado", "__observador")
 
-    def __init__(self, nombre, categoria, cantidad, precio, codigo=None):
+    def __init__(self, nombre, categoria, cantidad, precio=None, codigo=None, centimos=None):
+        # El precio llega en unidades (precio) o ya en céntimos (centimos).
         if not codigo or codigo.strip() == "":
             Producto._contador_id += 1
             self.__codigo = f"P{Producto._contador_id:03d}"
@@ -36,11 +141,18 @@ class Producto:
             self.__actualizar_contador(self.__codigo)
 
         self.__nombre = nombre.strip()
-        self.__categoria = categoria.strip()
+        self.__claveNombre = None
+        self.__idCategoria = CATEGORIAS.id(categoria.strip())
         self.__cantidad = int(cantidad)
-        self.__precio = float(precio)
-        self.__fechaCreacion = datetime.now()
-        self.__fechaUltimaModificacion = datetime.now()
+        self.__centimos = int(centimos) if centimos is not None else aCentimos(precio)
+        self.__reservado = 0
+        # Sube con cada cambio de stock, precio o reservas. Quien leyó el
+        # producto en la versión v puede escribir sólo si sigue en v.
+        self.__version = 0
+        # Marcas enteras del reloj del inventario; se convierten a datetime
+        # sólo cuando alguien pide la fecha.
+        self.__creado = self.__modificado = ahora()
+        self.__observador = None
 
     @classmethod
     def __actualizar_contador(cls, codigo_existente):
@@ -56,19 +168,94 @@ class Producto:
     # Getters
     def get_codigo(self): return self.__codigo
     def get_nombre(self): return self.__nombre
-    def get_categoria(self): return self.__categoria
+    def get_categoria(self): return CATEGORIAS.nombre(self.__idCategoria)
+    def get_idCategoria(self): return self.__idCategoria
+    def get_claveCategoria(self): return CATEGORIAS.clave(self.__idCategoria)
     def get_cantidad(self): return self.__cantidad
-    def get_precio(self): return self.__precio
-    def get_fechaCreacion(self): return self.__fechaCreacion
-    def get_fechaUltimaModificacion(self): return self.__fechaUltimaModificacion
+    def get_precio(self): return self.__centimos / 100
+    def get_centimos(self): return self.__centimos
+    def get_reservado(self): return self.__reservado
+    def get_disponible(self): return self.__cantidad - self.__reservado
+    def get_version(self): return self.__version
+    def get_marcaCreacion(self): return self.__creado
+    def get_marcaUltimaModificacion(self): return self.__modificado
+    def get_fechaCreacion(self): return aFecha(self.__creado)
+    def get_fechaUltimaModificacion(self): return aFecha(self.__modificado)
+
+    def get_claveNombre(self):
+        """Nombre en minúsculas para las búsquedas; se calcula la primera vez que se pide."""
+        if self.__claveNombre is None:
+            self.__claveNombre = self.__nombre.lower()
+        return self.__claveNombre
+
+    # El número de categoría sólo vale dentro de este proceso: al serializar
+    # se guarda el texto y al cargar se vuelve a registrar en la tabla local.
+    # El observador (el inventario que lo contiene) no viaja con el producto.
+    def __getstate__(self):
+        return (self.__codigo, self.__nombre, self.get_categoria(), self.__cantidad, self.__centimos,
+                self.__reservado, self.__version, self.__creado, self.__modificado)
 
-    def set_cantidad(self, cantidad): 
+    def __setstate__(self, estado):
+        (self.__codigo, self.__nombre, categoria, self.__cantidad, self.__centimos,
+         self.__reservado, self.__version, self.__creado, self.__modificado) = estado
+        self.__claveNombre = None
+        self.__observador = None
+        self.__idCategoria = CATEGORIAS.id(categoria)
+        # Los códigos automáticos que se creen después no deben repetir este.
+        self.__actualizar_contador(self.__codigo)
+
+    def _set_observador(self, observador):
+        # El inventario que contiene al producto se entera de cada cambio de
+        # stock o precio para mantener sus índices sin recorrer la lista.
+        self.__observador = observador
+
+    def __notificar(self, anterior):
+        if self.__observador is not None:
+            self.__observador._stockCambiado(self, anterior, self.__cantidad)
+
+    # Las actualizaciones en lote pasan una única marca compartida para no
+    # consultar el reloj una vez por producto.
+    def set_cantidad(self, cantidad, marca=None): 
+        anterior = self.__cantidad
         self.__cantidad = cantidad
-        self.__fechaUltimaModificacion = datetime.now()
+        self.__modificado = ahora() if marca is None else marca
+        self.__version += 1
+        self.__notificar(anterior)
+
+    def _ajustarReservado(self, delta):
+        anterior = self.__reservado
+        self.__reservado += delta
+        self.__version += 1
+        if self.__observador is not None:
+            self.__observador._reservadoCambiado(self, anterior, self.__reservado)
+
+    def set_precio(self, precio, marca=None):
+        self.set_centimos(aCentimos(precio), marca)
+
+    def set_centimos(self, centimos, marca=None):
+        anterior = self.__centimos
+        self.__centimos = centimos
+        self.__modificado = ahora() if marca is None else marca
+        self.__version += 1
+        if self.__observador is not None:
+            self.__observador._precioCambiado(self, anterior, centimos)
 
     def mostrarInfo(self):
-        return f"{self.__codigo:<10} {self.__nombre:<20} {self.__categoria:<15} {self.__precio:<10.2f} {self.__cantidad:<5}"
+        return f"{self.__codigo:<10} {self.__nombre:<20} {self.get_categoria():<15} {formatearCentimos(self.__centimos):<10} {self.__cantidad:<5}"
 
-    def actualizarStock(self, cantidad):
+    def actualizarStock(self, cantidad, marca=None):
+        anterior = self.__cantidad
         self.__cantidad = cantidad
-        self.__fechaUltimaModificacion = datetime.now()
\ No newline at end of file
+        self.__modificado = ahora() if marca is None else marca
+        self.__version += 1
+        self.__notificar(anterior)
+
+
+# Slot de Producto que guarda cada campo ordenable: los criterios de orden
+# arman sus claves con operator.attrgetter sobre él, sin llamar al getter.
+COLUMNAS_PRODUCTO = {
+    "codigo": "_Producto__codigo",
+    "nombre": "_Producto__nombre",
+    "stock": "_Producto__cantidad",
+    "precio": "_Producto__centimos",
+}
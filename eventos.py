@@ -0,0 +1,121 @@
+import time
+from collections import deque, namedtuple
+
+# =============================================================================
+# FLUJO DE EVENTOS (CAMBIOS DEL INVENTARIO)
+# =============================================================================
+# Cada vez que una acción (o su reversión) cambia un producto, el inventario
+# publica un EventoCambio. Quien necesite seguir los cambios se suscribe y
+# consume su cola en lugar de recorrer y comparar toda la lista.
+#
+# Campos publicados:
+#   "producto"  -> alta (anterior=None) o baja (nuevo=None); el valor es
+#                  la tupla (nombre, categoria, cantidad, centimos)
+#   "cantidad", "precio", "reservado" -> valor anterior y nuevo (el precio
+#                  en céntimos enteros)
+
+EventoCambio = namedtuple("EventoCambio", "codigo campo anterior nuevo fecha")
+
+
+def datosProducto(producto):
+    return (producto.get_nombre(), producto.get_categoria(), producto.get_cantidad(), producto.get_centimos())
+
+
+class Suscripcion:
+    """Cola acotada: si el consumidor se atrasa se descartan los eventos más viejos."""
+
+    def __init__(self, capacidad):
+        self.__cola = deque(maxlen=capacidad)
+        self.__descartados = 0
+
+    def __len__(self):
+        return len(self.__cola)
+
+    def get_descartados(self):
+        # Si es mayor a cero el consumidor perdió eventos y debe releer todo.
+        return self.__descartados
+
+    def _recibir(self, evento):
+        if len(self.__cola) == self.__cola.maxlen:
+            self.__descartados += 1
+        self.__cola.append(evento)
+
+    def obtener(self, maximo=None):
+        cola = self.__cola
+        n = len(cola) if maximo is None else min(maximo, len(cola))
+        return [cola.popleft() for _ in range(n)]
+
+
+class BusEventos:
+    def __init__(self):
+        self.__suscripciones = []
+        self.__sumideros = []
+
+    def hayOyentes(self):
+        return bool(self.__suscripciones or self.__sumideros)
+
+    def suscribir(self, capacidad=1024):
+        suscripcion = Suscripcion(capacidad)
+        self.__suscripciones.append(suscripcion)
+        return suscripcion
+
+    def desuscribir(self, suscripcion):
+        if suscripcion in self.__suscripciones:
+            self.__suscripciones.remove(suscripcion)
+
+    def conectar(self, sumidero):
+        self.__sumideros.append(sumidero)
+
+    def desconectar(self, sumidero):
+        if sumidero in self.__sumideros:
+            self.__sumideros.remove(sumidero)
+            sumidero.cerrar()
+
+    def publicar(self, codigo, campo, anterior, nuevo):
+        if not (self.__suscripciones or self.__sumideros):
+            return
+        evento = EventoCambio(codigo, campo, anterior, nuevo, time.time())
+        for suscripcion in self.__suscripciones:
+            suscripcion._recibir(evento)
+        for sumidero in self.__sumideros:
+            sumidero.escribir(evento)
+
+
+# =============================================================================
+# SUMIDEROS
+# =============================================================================
+
+class SumideroArchivo:
+    """Agrega cada evento como una línea JSON al final de un archivo local."""
+
+    def __init__(self, ruta):
+        import json  # Sólo se carga si alguien conecta un sumidero.
+        self.__dumps = json.dumps
+        self.__archivo = open(ruta, mode='a', encoding='utf-8', buffering=1)
+
+    def escribir(self, evento):
+        self.__archivo.write(self.__dumps(evento._asdict(), ensure_ascii=False) + "\n")
+
+    def cerrar(self):
+        self.__archivo.close()
+
+
+class SumideroSocket:
+    """Envía cada evento como un datagrama UDP JSON; si nadie escucha se pierde."""
+
+    def __init__(self, puerto, host="127.0.0.1"):
+        import json
+        import socket
+        self.__dumps = json.dumps
+        self.__destino = (host, puerto)
+        self.__socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.__socket.setblocking(False)
+
+    def escribir(self, evento):
+        try:
+            self.__socket.sendto(self.__dumps(evento._asdict(), ensure_ascii=False).encode("utf-8"), self.__destino)
+        except OSError:
+            pass
+
+    def cerrar(self):
+        self.__socket.close()
@@ -0,0 +1,640 @@
+import heapq
+import math
+import unicodedata
+from abc import ABC, abstractmethod
+from bisect import bisect_left, bisect_right
+from itertools import accumulate, count
+from operator import itemgetter
+from dominio import claveCategoria
+
+# =============================================================================
+# ÍNDICES DEL INVENTARIO
+# =============================================================================
+# Cada índice se mantiene de forma incremental desde Inventario._insertar /
+# Inventario._retirar y expone dos operaciones para el planificador de
+# consultas:
+#   estimar(consulta)    -> cantidad de candidatos que entregaría, o None si
+#                           el índice no sirve para esa consulta.
+#   candidatos(consulta) -> iterable con esos candidatos.
+# Además reciben stockCambiado() / precioCambiado() cuando un producto
+# indexado cambia de stock o de precio.
+#
+# Algunos índices acumulan las altas y las incorporan juntas en consolidar().
+# Lo llama el inventario con el candado de escritura tomado, antes de
+# soltarlo; los lectores nunca modifican un índice.
+#
+# copia() devuelve un índice con el mismo contenido para preparar cambios
+# aparte (una importación) y publicarlos de una vez. Comparte con el original
+# las colecciones internas y sólo copia las que luego modifica. Los mapas de
+# producto a clave, que sólo consulta el que escribe, se comparten siempre: a
+# los lectores del original no les cambia nada que tengan entradas de más.
+
+class Indice(ABC):
+    nombre = None
+
+    @abstractmethod
+    def agregar(self, producto): pass
+
+    @abstractmethod
+    def quitar(self, producto): pass
+
+    def stockCambiado(self, producto, anterior, nuevo): pass
+
+    def precioCambiado(self, producto, anterior, nuevo): pass
+
+    def consolidar(self): pass
+
+    @abstractmethod
+    def copia(self): pass
+
+    def estimar(self, consulta): return None
+
+    def candidatos(self, consulta): return iter(())
+
+    def cubre(self): return set()
+
+    def entregaOrdenadoPor(self, criterio): return False
+
+
+class FotoArreglo:
+    """
+    Contenido de un ArregloOrdenado en un momento dado. Nunca se modifica:
+    cada cambio arma otra foto, así que un lector puede recorrerla sin
+    candado aunque mientras tanto se publiquen otras. Las claves van en
+    bloques de tuplas; cambiar unas pocas claves sólo rearma sus bloques y las
+    listas de bloques, no el arreglo entero.
+    """
+    TAMANO_BLOQUE = 512
+
+    def __init__(self, bloques=()):
+        self.__bloques = tuple(bloques)  # ((claves...), (valores...))
+        self.__primeras = [claves[0] for claves, _ in self.__bloques]
+        self.__inicios = [0, *accumulate(len(claves) for claves, _ in self.__bloques)]
+
+    @classmethod
+    def desdePares(cls, pares):
+        """Foto con los pares (clave, valor) ya ordenados por clave."""
+        tamano = cls.TAMANO_BLOQUE
+        bloques = []
+        for inicio in range(0, len(pares), tamano):
+            tramo = pares[inicio:inicio + tamano]
+            bloques.append((tuple(clave for clave, _ in tramo), tuple(valor for _, valor in tramo)))
+        return cls(bloques)
+
+    def __len__(self):
+        return self.__inicios[-1]
+
+    def __bloque(self, clave):
+        # Último bloque cuya primera clave no supera a `clave` (o el primero).
+        return max(0, bisect_right(self.__primeras, clave) - 1)
+
+    def contiene(self, clave):
+        if not self.__bloques:
+            return False
+        claves = self.__bloques[self.__bloque(clave)][0]
+        pos = bisect_left(claves, clave)
+        return pos < len(claves) and claves[pos] == clave
+
+    def posicion(self, clave):
+        """Como bisect_left sobre todas las claves."""
+        if not self.__bloques:
+            return 0
+        i = max(0, bisect_left(self.__primeras, clave) - 1)
+        return self.__inicios[i] + bisect_left(self.__bloques[i][0], clave)
+
+    def posicionTras(self, clave):
+        """Como bisect_right sobre todas las claves."""
+        if not self.__bloques:
+            return 0
+        i = self.__bloque(clave)
+        return self.__inicios[i] + bisect_right(self.__bloques[i][0], clave)
+
+    def __tramos(self, inicio, fin):
+        fin = len(self) if fin is None else min(fin, len(self))
+        if inicio >= fin:
+            return
+        i = bisect_right(self.__inicios, inicio) - 1
+        while inicio < fin:
+            base = self.__inicios[i]
+            hasta = min(fin, self.__inicios[i + 1])
+            yield self.__bloques[i], inicio - base, hasta - base
+            inicio = hasta
+            i += 1
+
+    def valores(self, inicio=0, fin=None):
+        for (_, valores), desde, hasta in self.__tramos(inicio, fin):
+            yield from valores[desde:hasta]
+
+    def pares(self, inicio=0, fin=None):
+        for (claves, valores), desde, hasta in self.__tramos(inicio, fin):
+            yield from zip(claves[desde:hasta], valores[desde:hasta])
+
+    def cambiar(self, quitadas, altas):
+        """Otra foto sin las claves `quitadas` y con los pares de `altas`."""
+        bloques = list(self.__bloques) or [((), ())]
+        tocados = {}  # índice de bloque -> (claves, valores) en listas nuevas
+        def tocar(i):
+            if i not in tocados:
+                tocados[i] = (list(bloques[i][0]), list(bloques[i][1]))
+            return tocados[i]
+
+        for clave in quitadas:
+            claves, valores = tocar(self.__bloque(clave))
+            pos = bisect_left(claves, clave)
+            del claves[pos]
+            del valores[pos]
+        for clave, valor in altas.items():
+            claves, valores = tocar(self.__bloque(clave))
+            pos = bisect_right(claves, clave)
+            claves.insert(pos, clave)
+            valores.insert(pos, valor)
+
+        tamano = self.TAMANO_BLOQUE
+        # De atrás hacia adelante, para que partir o quitar un bloque no mueva
+        # los índices de los que faltan.
+        for i in sorted(tocados, reverse=True):
+            claves, valores = tocados[i]
+            if len(claves) > 2 * tamano:
+                partes = [(tuple(claves[k:k + tamano]), tuple(valores[k:k + tamano]))
+                          for k in range(0, len(claves), tamano)]
+            elif claves:
+                partes = [(tuple(claves), tuple(valores))]
+            else:
+                partes = []
+            bloques[i:i + 1] = partes
+        return FotoArreglo(bloques)
+
+
+class ArregloOrdenado:
+    """
+    Claves únicas ordenadas, cada una con su valor. Las altas y bajas se
+    acumulan y se aplican juntas en consolidar(), que publica otra FotoArreglo
+    con una sola asignación: los lectores toman la foto con get_foto() y
+    nunca ven un cambio a medias. Una importación masiva paga una sola mezcla.
+    """
+    UMBRAL_INSERCION = 32
+
+    def __init__(self):
+        self.__foto = FotoArreglo()
+        self.__pendientes = {}
+        self.__quitadas = set()
+
+    def __len__(self):
+        return len(self.__foto) + len(self.__pendientes) - len(self.__quitadas)
+
+    def copia(self):
+        # La foto es inmutable: se comparte tal cual.
+        nuevo = ArregloOrdenado()
+        nuevo.__foto = self.__foto
+        nuevo.__pendientes = dict(self.__pendientes)
+        nuevo.__quitadas = set(self.__quitadas)
+        return nuevo
+
+    def insertar(self, clave, valor):
+        self.__pendientes[clave] = valor
+
+    def quitar(self, clave):
+        if clave in self.__pendientes:
+            del self.__pendientes[clave]
+        elif self.__foto.contiene(clave):
+            self.__quitadas.add(clave)
+
+    def consolidar(self):
+        pendientes, quitadas = self.__pendientes, self.__quitadas
+        if not pendientes and not quitadas:
+            return
+        if len(pendientes) + len(quitadas) <= self.UMBRAL_INSERCION:
+            self.__foto = self.__foto.cambiar(quitadas, pendientes)
+        else:
+            pares = list(self.__foto.pares())
+            if quitadas:
+                pares = [par for par in pares if par[0] not in quitadas]
+            # Dos tramos ya ordenados: sort() sólo tiene que mezclarlos.
+            pares.extend(sorted(pendientes.items(), key=itemgetter(0)))
+            pares.sort(key=itemgetter(0))
+            self.__foto = FotoArreglo.desdePares(pares)
+        self.__pendientes = {}
+        self.__quitadas = set()
+
+    def get_foto(self):
+        return self.__foto
+
+
+class IndicePrecio(Indice):
+    """Productos ordenados por precio (y por orden de llegada en empates)."""
+    nombre = "precio"
+
+    def __init__(self):
+        self.__arreglo = ArregloOrdenado()
+        self.__clavePorProducto = {}
+        self.__secuencia = count()
+
+    def __len__(self):
+        return len(self.__arreglo)
+
+    def agregar(self, producto):
+        clave = (producto.get_centimos(), next(self.__secuencia))
+        self.__arreglo.insertar(clave, producto)
+        self.__clavePorProducto[id(producto)] = clave
+
+    def quitar(self, producto):
+        clave = self.__clavePorProducto.pop(id(producto), None)
+        if clave is not None:
+            self.__arreglo.quitar(clave)
+
+    def precioCambiado(self, producto, anterior, nuevo):
+        clave = self.__clavePorProducto.get(id(producto))
+        if clave is None:
+            return
+        self.__arreglo.quitar(clave)
+        # Se conserva la secuencia original: el producto no "llega" de nuevo.
+        clave = (nuevo, clave[1])
+        self.__arreglo.insertar(clave, producto)
+        self.__clavePorProducto[id(producto)] = clave
+
+    def consolidar(self):
+        self.__arreglo.consolidar()
+
+    def copia(self):
+        nuevo = IndicePrecio()
+        nuevo.__arreglo = self.__arreglo.copia()
+        nuevo.__clavePorProducto = self.__clavePorProducto
+        # La secuencia también: las claves de ambos siguen siendo únicas.
+        nuevo.__secuencia = self.__secuencia
+        return nuevo
+
+    def __rango(self, foto, minimo, maximo):
+        inicio = 0 if minimo is None else foto.posicion((minimo,))
+        fin = len(foto) if maximo is None else foto.posicionTras((maximo, float("inf")))
+        return inicio, max(inicio, fin)
+
+    def estimar(self, consulta):
+        minimo, maximo = consulta.get_rangoCentimos()
+        if minimo is None and maximo is None:
+            return None
+        inicio, fin = self.__rango(self.__arreglo.get_foto(), minimo, maximo)
+        return fin - inicio
+
+    def candidatos(self, consulta):
+        foto = self.__arreglo.get_foto()
+        inicio, fin = self.__rango(foto, *consulta.get_rangoCentimos())
+        yield from foto.valores(inicio, fin)
+
+    def cubre(self):
+        return {"precio"}
+
+    def ordenados(self):
+        """Todos los productos por precio ascendente (empates por llegada)."""
+        return list(self.__arreglo.get_foto().valores())
+
+    def entregaOrdenadoPor(self, criterio):
+        # El índice ya recorre por precio ascendente respetando el orden de
+        # llegada, exactamente como lo haría sorted().
+        return criterio.campo == "precio" and not criterio.descendente
+
+
+class ParticionCategoria:
+    """Productos de una categoría con sus totales acumulados."""
+
+    def __init__(self, nombre):
+        self.__nombre = nombre
+        self.__productos = {}
+        self.__unidades = 0
+        self.__valorCentimos = 0  # entero: el total no acumula redondeos
+
+    def get_nombre(self): return self.__nombre
+    def get_cantidadProductos(self): return len(self.__productos)
+    def get_unidades(self): return self.__unidades
+    def get_valor(self): return self.__valorCentimos / 100
+    def get_valorCentimos(self): return self.__valorCentimos
+
+    def __len__(self):
+        return len(self.__productos)
+
+    def __iter__(self):
+        # Los lectores no toman el candado del inventario: reciben una copia
+        # (la tupla se arma en C de una sola vez) y no el diccionario vivo.
+        return iter(tuple(self.__productos))
+
+    def __contains__(self, producto):
+        return producto in self.__productos
+
+    def copia(self):
+        nueva = ParticionCategoria(self.__nombre)
+        nueva.__productos = dict(self.__productos)
+        nueva.__unidades = self.__unidades
+        nueva.__valorCentimos = self.__valorCentimos
+        return nueva
+
+    def agregar(self, producto):
+        self.__productos[producto] = None
+        self.__unidades += producto.get_cantidad()
+        self.__valorCentimos += producto.get_cantidad() * producto.get_centimos()
+
+    def quitar(self, producto):
+        del self.__productos[producto]
+        self.__unidades -= producto.get_cantidad()
+        self.__valorCentimos -= producto.get_cantidad() * producto.get_centimos()
+
+    def stockCambiado(self, producto, anterior, nuevo):
+        self.__unidades += nuevo - anterior
+        self.__valorCentimos += (nuevo - anterior) * producto.get_centimos()
+
+    def precioCambiado(self, producto, anterior, nuevo):
+        self.__valorCentimos += producto.get_cantidad() * (nuevo - anterior)
+
+
+class IndiceCategorias(Indice):
+    """Particiona el inventario por categoría (sin distinguir mayúsculas)."""
+    nombre = "categoria"
+
+    def __init__(self):
+        self.__particiones = {}
+        self.__propias = None  # claves ya copiadas; None: todas son propias
+
+    def copia(self):
+        nuevo = IndiceCategorias()
+        nuevo.__particiones = dict(self.__particiones)
+        nuevo.__propias = set()
+        return nuevo
+
+    def get_particion(self, categoria):
+        return self.__particiones.get(claveCategoria(categoria))
+
+    def get_particiones(self):
+        return list(self.__particiones.values())
+
+    def __particionEscribible(self, clave):
+        particion = self.__particiones.get(clave)
+        if particion is not None and self.__propias is not None and clave not in self.__propias:
+            particion = self.__particiones[clave] = particion.copia()
+            self.__propias.add(clave)
+        return particion
+
+    def agregar(self, producto):
+        clave = producto.get_claveCategoria()
+        particion = self.__particionEscribible(clave)
+        if particion is None:
+            particion = ParticionCategoria(producto.get_categoria())
+            self.__particiones[clave] = particion
+        particion.agregar(producto)
+
+    def quitar(self, producto):
+        clave = producto.get_claveCategoria()
+        particion = self.__particiones.get(clave)
+        if particion is None or producto not in particion:
+            return
+        particion = self.__particionEscribible(clave)
+        particion.quitar(producto)
+        if not len(particion):
+            del self.__particiones[clave]
+
+    def stockCambiado(self, producto, anterior, nuevo):
+        particion = self.__particionEscribible(producto.get_claveCategoria())
+        if particion is not None:
+            particion.stockCambiado(producto, anterior, nuevo)
+
+    def precioCambiado(self, producto, anterior, nuevo):
+        particion = self.__particionEscribible(producto.get_claveCategoria())
+        if particion is not None:
+            particion.precioCambiado(producto, anterior, nuevo)
+
+    def estimar(self, consulta):
+        categoria = consulta.get_categoria()
+        if categoria is None:
+            return None
+        particion = self.__particiones.get(categoria)
+        return 0 if particion is None else len(particion)
+
+    def candidatos(self, consulta):
+        particion = self.__particiones.get(consulta.get_categoria())
+        return iter(()) if particion is None else iter(particion)
+
+    def cubre(self):
+        return {"categoria"}
+
+
+# Los nombres y códigos ASCII (la gran mayoría) no tienen tildes que quitar:
+# se resuelven con métodos de str, sin recorrer carácter por carácter.
+_SEPARADORES_ASCII = {i: " " for i in range(128) if not chr(i).isalnum()}
+
+
+def normalizar(texto):
+    """Minúsculas y sin tildes: 'Cámara HD' -> 'camara hd'."""
+    texto = texto.strip()
+    if texto.isascii():
+        return texto.lower()
+    descompuesto = unicodedata.normalize("NFKD", texto.casefold())
+    return "".join(c for c in descompuesto if not unicodedata.combining(c))
+
+
+def trigramas(normalizado):
+    conjunto = set()
+    if normalizado.isascii():
+        palabras = normalizado.translate(_SEPARADORES_ASCII).split()
+    else:
+        palabras = "".join(c if c.isalnum() else " " for c in normalizado).split()
+    for palabra in palabras:
+        relleno = f"  {palabra} "
+        for i in range(len(relleno) - 2):
+            conjunto.add(relleno[i:i + 3])
+    return conjunto
+
+
+class IndiceTrigramas(Indice):
+    """
+    Índice invertido de trigramas sobre los nombres normalizados. Las altas
+    de una escritura se acumulan y se indexan juntas al consolidar, antes de
+    soltar el candado: la primera búsqueda no tiene que construir nada.
+    """
+    nombre = "trigramas"
+
+    def __init__(self):
+        self.__listas = {}
+        self.__trigramasPorProducto = {}
+        self.__pendientes = {}
+        self.__propias = None  # trigramas con lista ya copiada; None: todas
+
+    def __len__(self):
+        return len(self.__trigramasPorProducto) + len(self.__pendientes)
+
+    def copia(self):
+        nuevo = IndiceTrigramas()
+        nuevo.__listas = dict(self.__listas)
+        nuevo.__trigramasPorProducto = self.__trigramasPorProducto
+        nuevo.__pendientes = dict(self.__pendientes)
+        nuevo.__propias = set()
+        return nuevo
+
+    def __listaEscribible(self, g):
+        lista = self.__listas[g]
+        if self.__propias is not None and g not in self.__propias:
+            lista = self.__listas[g] = dict(lista)
+            self.__propias.add(g)
+        return lista
+
+    def agregar(self, producto):
+        self.__pendientes[producto] = None
+
+    def consolidar(self):
+        # Como en ArregloOrdenado, los pendientes se vacían al final. Al
+        # cargar un inventario entero se indexa todo aquí, así que el ciclo
+        # usa variables locales y sólo copia listas en un índice derivado.
+        listas = self.__listas
+        propias = self.__propias
+        porProducto = self.__trigramasPorProducto
+        for producto in self.__pendientes:
+            grams = frozenset(trigramas(normalizar(producto.get_nombre())))
+            porProducto[producto] = grams
+            for g in grams:
+                lista = listas.get(g)
+                if lista is None:
+                    listas[g] = {producto: None}
+                    if propias is not None:
+                        propias.add(g)
+                elif propias is None or g in propias:
+                    lista[producto] = None
+                else:
+                    self.__listaEscribible(g)[producto] = None
+        self.__pendientes = {}
+
+    def quitar(self, producto):
+        if producto in self.__pendientes:
+            del self.__pendientes[producto]
+            return
+        grams = self.__trigramasPorProducto.pop(producto, None)
+        if grams is None:
+            return
+        for g in grams:
+            lista = self.__listaEscribible(g)
+            del lista[producto]
+            if not lista:
+                del self.__listas[g]
+
+    def buscar(self, texto, limite, umbral, maxCandidatos):
+        consulta = trigramas(normalizar(texto))
+        if not consulta:
+            return []
+
+        # Filtro por prefijo: para alcanzar el umbral un nombre debe compartir
+        # al menos `minimo` trigramas con la consulta, así que basta recorrer
+        # las (len - minimo + 1) listas más cortas para no perder a ninguno.
+        minimo = max(1, math.ceil(umbral * len(consulta) - 1e-9))
+        listas = sorted((self.__listas.get(g, ()) for g in consulta), key=len)
+        candidatos = {}
+        for lista in listas[:len(consulta) - minimo + 1]:
+            # Copia: el que escribe puede estar modificando la lista.
+            for producto in tuple(lista):
+                candidatos[producto] = None
+                if len(candidatos) >= maxCandidatos:
+                    break
+            else:
+                continue
+            break
+
+        puntuados = []
+        total = len(consulta)
+        for producto in candidatos:
+            grams = self.__trigramasPorProducto.get(producto)
+            if grams is None:  # lo quitaron después de tomar la lista
+                continue
+            comunes = len(consulta & grams)
+            if comunes >= minimo:
+                cobertura = comunes / total
+                dice = 2 * comunes / (total + len(grams))
+                puntuados.append((cobertura, dice, producto))
+
+        mejores = heapq.nlargest(limite, puntuados, key=lambda t: (t[0], t[1]))
+        return [t[2] for t in mejores]
+
+
+class IndicePrefijos(Indice):
+    """
+    Códigos y nombres normalizados en un arreglo ordenado para autocompletar.
+    Como IndiceTrigramas, las altas se ordenan juntas al consolidar.
+    """
+    nombre = "prefijos"
+
+    def __init__(self):
+        self.__arreglo = ArregloOrdenado()
+        self.__clavesPorProducto = {}
+        self.__secuencia = count()
+
+    def __len__(self):
+        return len(self.__arreglo) // 2  # código y nombre de cada producto
+
+    def agregar(self, producto):
+        orden = next(self.__secuencia)
+        claves = ((normalizar(producto.get_codigo()), orden, 0), (normalizar(producto.get_nombre()), orden, 1))
+        for clave in claves:
+            self.__arreglo.insertar(clave, producto)
+        self.__clavesPorProducto[producto] = claves
+
+    def quitar(self, producto):
+        claves = self.__clavesPorProducto.pop(producto, None)
+        if claves is None:
+            return
+        for clave in claves:
+            self.__arreglo.quitar(clave)
+
+    def consolidar(self):
+        self.__arreglo.consolidar()
+
+    def copia(self):
+        nuevo = IndicePrefijos()
+        nuevo.__arreglo = self.__arreglo.copia()
+        nuevo.__clavesPorProducto = self.__clavesPorProducto
+        nuevo.__secuencia = self.__secuencia
+        return nuevo
+
+    def sugerir(self, prefijo, limite):
+        prefijo = normalizar(prefijo)
+        foto = self.__arreglo.get_foto()
+        resultado = {}
+        for clave, producto in foto.pares(foto.posicion((prefijo,))):
+            if len(resultado) >= limite or not clave[0].startswith(prefijo):
+                break
+            resultado[producto] = None
+        return list(resultado)
+
+
+def claveCodigo(codigo):
+    return codigo.strip().upper()
+
+
+class IndiceCodigos(Indice):
+    """Acceso directo por código (sin distinguir mayúsculas)."""
+    nombre = "codigos"
+
+    def __init__(self):
+        self.__productos = {}
+
+    def __len__(self):
+        return len(self.__productos)
+
+    def buscar(self, codigo):
+        # Si hubiera códigos repetidos se devuelve el primero en llegar,
+        # igual que el recorrido lineal de BusquedaPorCodigo.
+        grupo = self.__productos.get(claveCodigo(codigo))
+        return next(iter(grupo)) if grupo else None
+
+    def copia(self):
+        # Los grupos nunca se modifican (se reemplazan), así que alcanza con
+        # copiar el diccionario de afuera.
+        nuevo = IndiceCodigos()
+        nuevo.__productos = dict(self.__productos)
+        return nuevo
+
+    def agregar(self, producto):
+        clave = claveCodigo(producto.get_codigo())
+        self.__productos[clave] = {**self.__productos.get(clave, {}), producto: None}
+
+    def quitar(self, producto):
+        clave = claveCodigo(producto.get_codigo())
+        grupo = self.__productos.get(clave)
+        if grupo is None or producto not in grupo:
+            return
+        if len(grupo) == 1:
+            del self.__productos[clave]
+        else:
+            self.__productos[clave] = {p: None for p in grupo if p is not producto}
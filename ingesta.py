@@ -0,0 +1,165 @@
+import codecs
+import csv
+import io
+import itertools
+import unicodedata
+from collections import namedtuple
+
+# =============================================================================
+# INGESTA DE ARCHIVOS CSV
+# =============================================================================
+# Los archivos llegan de distintos sistemas: UTF-8 o Latin-1/Windows-1252,
+# separados por coma, punto y coma, tabulador o barra, con las columnas en
+# cualquier orden y con o sin encabezado. detectarFormato() mira sólo los
+# primeros bytes del archivo y decide codificación, separador y a qué
+# posición corresponde cada campo (por el nombre de la columna, con sinónimos
+# habituales). Si no hay encabezado se asume el orden clásico.
+#
+# leerRegistros() lee el archivo en bloques binarios grandes, los decodifica
+# de forma incremental (un carácter partido entre dos bloques no se pierde) y
+# entrega al lector csv de C las líneas de cada bloque de una vez: Python sólo
+# interviene una vez por bloque, no por línea.
+
+CAMPOS = ("codigo", "nombre", "categoria", "cantidad", "precio")
+
+SINONIMOS = {
+    "codigo": ("codigo", "cod", "sku", "id", "item", "referencia", "ref"),
+    "nombre": ("nombre", "descripcion", "producto", "articulo", "detalle"),
+    "categoria": ("categoria", "familia", "rubro", "linea", "grupo"),
+    "cantidad": ("cantidad", "stock", "existencias", "existencia", "cant", "unidades", "saldo"),
+    "precio": ("precio", "precio unitario", "p unitario", "pu", "valor", "costo", "importe"),
+}
+
+DELIMITADORES = ",;\t|"
+TAMANO_MUESTRA = 64 * 1024
+TAMANO_BLOQUE = 1024 * 1024
+
+FormatoArchivo = namedtuple("FormatoArchivo", "codificacion delimitador encabezado columnas")
+
+
+def normalizarEncabezado(texto):
+    sin_tildes = unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode("ascii")
+    return " ".join(sin_tildes.lower().replace("_", " ").replace(".", " ").split())
+
+
+_CAMPO_DE = {sinonimo: campo for campo, sinonimos in SINONIMOS.items() for sinonimo in sinonimos}
+
+
+def detectarCodificacion(muestra):
+    if muestra.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    if muestra.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return "utf-16"
+    try:
+        # final=False: la muestra puede cortar un carácter multibyte al final.
+        codecs.getincrementaldecoder("utf-8")().decode(muestra, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        # cp1252 es Latin-1 más los caracteres que Excel en Windows usa en
+        # 0x80-0x9F; si ni eso decodifica, latin-1 acepta cualquier byte.
+        try:
+            muestra.decode("cp1252")
+            return "cp1252"
+        except UnicodeDecodeError:
+            return "latin-1"
+
+
+def detectarDelimitador(lineas):
+    try:
+        return csv.Sniffer().sniff("\n".join(lineas), delimiters=DELIMITADORES).delimiter
+    except csv.Error:
+        # Sin una respuesta clara, el separador que más aparece en la primera línea.
+        primera = lineas[0] if lineas else ""
+        return max(DELIMITADORES, key=primera.count) if primera else ","
+
+
+def mapearColumnas(encabezado):
+    """Devuelve {campo: posición} con los campos reconocidos en el encabezado."""
+    columnas = {}
+    for posicion, nombre in enumerate(encabezado):
+        campo = _CAMPO_DE.get(normalizarEncabezado(nombre))
+        if campo is not None and campo not in columnas:
+            columnas[campo] = posicion
+    return columnas
+
+
+def _esNumero(texto, delimitador):
+    if delimitador != ",":
+        texto = normalizarDecimal(texto)
+    try:
+        float(texto)
+        return True
+    except ValueError:
+        return False
+
+
+def _esEncabezado(fila, delimitador):
+    # Una fila de datos trae al menos la cantidad o el precio en número.
+    cantidad, precio = CAMPOS.index("cantidad"), CAMPOS.index("precio")
+    if len(fila) <= precio:
+        return False
+    return not _esNumero(fila[cantidad], delimitador) and not _esNumero(fila[precio], delimitador)
+
+
+def detectarFormato(ruta, codificacion=None, delimitador=None):
+    with open(ruta, mode='rb') as f:
+        muestra = f.read(TAMANO_MUESTRA)
+    codificacion = codificacion or detectarCodificacion(muestra)
+    texto = codecs.getincrementaldecoder(codificacion)(errors="replace").decode(muestra, final=False)
+    lineas = [l for l in texto.split("\n") if l.strip()]
+    if len(muestra) == TAMANO_MUESTRA and len(lineas) > 1:
+        lineas.pop()  # La última línea de la muestra puede estar cortada.
+    delimitador = delimitador or detectarDelimitador(lineas[:50])
+
+    primera = next(csv.reader(lineas[:1], delimiter=delimitador), [])
+    columnas = mapearColumnas(primera)
+    if len(columnas) == len(CAMPOS):
+        return FormatoArchivo(codificacion, delimitador, True, tuple(columnas[c] for c in CAMPOS))
+
+    # Encabezado incompleto o sin encabezado: se usa el orden clásico, siempre
+    # que las columnas reconocidas no digan otra cosa. La primera fila es
+    # encabezado si nombra alguna columna conocida o si ni la cantidad ni el
+    # precio son números (un encabezado en otro idioma); si no, es un
+    # producto más y, si trae valores inválidos, se rechaza con su motivo
+    # en lugar de descartarse en silencio.
+    clasico = tuple(range(len(CAMPOS)))
+    if any(columnas[campo] != CAMPOS.index(campo) for campo in columnas):
+        faltantes = [campo for campo in CAMPOS if campo not in columnas]
+        raise ValueError(f"El encabezado no tiene las columnas: {', '.join(faltantes)}.")
+    encabezado = bool(columnas) or _esEncabezado(primera, delimitador)
+    return FormatoArchivo(codificacion, delimitador, encabezado, clasico)
+
+
+def _bloquesDeLineas(ruta, codificacion, tamano_bloque):
+    decodificador = codecs.getincrementaldecoder(codificacion)()
+    pendiente = ""
+    with open(ruta, mode='rb') as f:
+        while True:
+            bloque = f.read(tamano_bloque)
+            final = not bloque
+            texto = pendiente + decodificador.decode(bloque, final=final)
+            # Lo que sigue al último "\n" puede ser una línea incompleta (o la
+            # mitad de un "\r\n"): espera al bloque siguiente. Con
+            # newline="\n" las líneas se cortan sólo en "\n" y conservan su
+            # fin de línea, que csv necesita para los campos entre comillas
+            # que ocupan varias líneas; splitlines cortaría también en \x0c,
+            # \x1c-\x1e, \x85 o \u2028, que pueden venir dentro de un campo.
+            corte = len(texto) if final else texto.rfind("\n") + 1
+            pendiente = texto[corte:]
+            yield io.StringIO(texto[:corte], newline="\n")
+            if final:
+                return
+
+
+def leerRegistros(ruta, formato, tamano_bloque=TAMANO_BLOQUE):
+    """Genera cada registro como lista de cadenas, incluido el encabezado si lo hay."""
+    lineas = itertools.chain.from_iterable(_bloquesDeLineas(ruta, formato.codificacion, tamano_bloque))
+    return csv.reader(lineas, delimiter=formato.delimitador)
+
+
+def normalizarDecimal(texto):
+    # Con separador ';' o tabulador los ERP suelen escribir "1.234,50".
+    texto = texto.strip()
+    if "," in texto:
+        texto = texto.replace(".", "").replace(",", ".")
+    return texto
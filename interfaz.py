@@ -1,8 +1,10 @@
 import os
 import time
-from dominio import Producto, StockInsuficienteError, HistorialVacioError, ProductoNoEncontradoError
-from negocio import BusquedaPorCodigo, BusquedaPorNombre, OrdenarPorStockAsc, OrdenarPorStockDesc, OrdenarPorPrecioAsc, OrdenarPorPrecioDesc
+from dominio import (Producto, validarPrecioStock, formatearCentimos, StockInsuficienteError, HistorialVacioError,
+                     ProductoNoEncontradoError)
+from negocio import BusquedaPorCodigo, BusquedaPorPrefijo, BUSQUEDAS, CRITERIOS
 from sistema import Inventario
+from alertas import VigilanteStock
 
 # =============================================================================
 # UTILIDADES DE CONSOLA
@@ -22,16 +24,26 @@ def pausa():
     print()
     input("[Enter] Para continuar...")
 
+def elegir_opcion(opciones, texto):
+    """Elemento de `opciones` que corresponde al número tecleado (desde 1), o None."""
+    texto = texto.strip()
+    if texto.isdecimal() and 1 <= int(texto) <= len(opciones):
+        return opciones[int(texto) - 1]
+    return None
 
 
-# =============================================================================
-# EJECUCIÓN
-# =============================================================================
-if __name__ == "__main__":
-    app = InterfazConsola()
-    app.iniciar()
 
-   def iniciar(self):
+class InterfazConsola:
+    def __init__(self):
+        self.inv = Inventario()
+        # Datos de prueba iniciales
+        self.inv.agregarProducto(Producto("Laptop Base", "Tecnologia", 5, 2000.00, codigo="P000"))
+        # Las alertas se muestran apenas un cambio de stock las dispara.
+        self.vigilante = VigilanteStock()
+        self.vigilante.suscribir(self.avisar_alerta)
+        self.inv.set_vigilanteStock(self.vigilante)
+
+    def iniciar(self):
         while True:
             limpiar_pantalla()
             print("-" * 60)
@@ -60,7 +72,8 @@ if __name__ == "__main__":
             print("[6] Mostrar inventario")
             print("[7] Importar inventario desde archivo")
             print("[8] Deshacer última acción")
-            print("[9] Salir")
+            print("[9] Alertas de stock bajo")
+            print("[10] Salir")
             print("-" * 75)
             
             opcion = input("Seleccione una opción: ")
@@ -73,13 +86,14 @@ if __name__ == "__main__":
             elif opcion == '6': self.pantalla_mostrar()
             elif opcion == '7': self.pantalla_importar()
             elif opcion == '8': self.pantalla_deshacer()
-            elif opcion == '9':
+            elif opcion == '9': self.pantalla_alertas()
+            elif opcion == '10':
                 if self.pantalla_salir(): return
 
 
 
 
-  def pantalla_salir(self):
+    def pantalla_salir(self):
         imprimir_encabezado("SALIR DEL SISTEMA")
         print("¿Está seguro que desea salir?\n")
         print("[1] Sí, salir")
@@ -103,18 +117,14 @@ if __name__ == "__main__":
             precio_str = input("Precio    : ")
             stock_str = input("Stock     : ")
             
-            precio = float(precio_str)
-            stock = int(stock_str)
-            
-            if precio < 0 or stock < 0:
-                raise ValueError("Los valores no pueden ser negativos.")
+            centimos, stock = validarPrecioStock(precio_str, stock_str)
 
             print("\n[1] Guardar producto")
             print("[2] Cancelar y volver al menú")
             opc = input("\nOpción: ")
 
             if opc == '1':
-                nuevo = Producto(nombre, categoria, stock, precio) 
+                nuevo = Producto(nombre, categoria, stock, centimos=centimos) 
                 self.inv.agregarProducto(nuevo)
                 print(f"\nMensaje: Producto registrado correctamente.")
                 print(f"CÓDIGO ASIGNADO: {nuevo.get_codigo()}")
@@ -129,45 +139,63 @@ if __name__ == "__main__":
     def pantalla_buscar(self):
         imprimir_encabezado("BUSCAR PRODUCTO")
         print("Seleccione tipo de búsqueda:\n")
-        print("[1] Buscar por CÓDIGO (Ver todos los detalles)")
-        print("[2] Buscar por NOMBRE (Ver lista resumen)")
-        print("[3] Volver al menú")
-        
-        opc = input("\nOpción: ")
+        opciones = list(BUSQUEDAS.values())
+        for n, entrada in enumerate(opciones, start=1):
+            print(f"[{n}] {entrada.etiqueta}")
+        print(f"[{len(opciones) + 1}] Volver al menú")
         
-        if opc == '1':
-            cod = input("\nIngrese código del producto: ")
-            res = self.inv.buscarProducto(BusquedaPorCodigo(), cod)
+        entrada = elegir_opcion(opciones, input("\nOpción: "))
+        if entrada is None:
+            return
+
+        texto = input(f"\n{entrada.pregunta}")
+        res = self.inv.buscarProducto(entrada.fabrica(), texto)
+        if isinstance(res, list):
+            print(f"\nSe encontraron {len(res)} coincidencias:")
+            if res:
+                print(f"\n{'Código':<10} {'Nombre':<20} {'Categoría':<15} {'Precio':<10} {'Stock':<5}")
+                print("-" * 65)
+                for p in res:
+                    print(p.mostrarInfo())
+            else:
+                print("No hubo resultados.")
+        else:
+            if not res:
+                res = self.sugerir_producto(texto)
             print("\nResultado:")
             if res:
                 print("-" * 40)
                 print(f"Código       : {res.get_codigo()}")
                 print(f"Nombre       : {res.get_nombre()}")
                 print(f"Categoría    : {res.get_categoria()}")
-                print(f"Precio       : {res.get_precio():.2f}")
+                print(f"Precio       : {formatearCentimos(res.get_centimos())}")
                 print(f"Stock        : {res.get_cantidad()}")
                 print(f"Fecha Creac. : {res.get_fechaCreacion().strftime('%d/%m/%Y %H:%M:%S')}")
                 print(f"Ult. Modif.  : {res.get_fechaUltimaModificacion().strftime('%d/%m/%Y %H:%M:%S')}")
                 print("-" * 40)
             else:
                 print("Mensaje: No se encontró ningún producto con ese criterio.")
-            pausa()
+        pausa()
+
 
-        elif opc == '2':
-            nom = input("\nIngrese nombre del producto: ")
-            res = self.inv.buscarProducto(BusquedaPorNombre(), nom)
-            print(f"\nSe encontraron {len(res)} coincidencias:")
-            if res:
-                print(f"\n{'Código':<10} {'Nombre':<20} {'Categoría':<15} {'Precio':<10} {'Stock':<5}")
-                print("-" * 65)
-                for p in res:
-                    print(p.mostrarInfo())
-            else:
-                print("No hubo resultados.")
-            pausa()
 
 
+    def sugerir_producto(self, texto):
+        if not texto.strip():
+            return None
+        sugerencias = self.inv.buscarProducto(BusquedaPorPrefijo(), texto)
+        if not sugerencias:
+            return None
 
+        print("\nNo existe ese código exacto. ¿Quiso decir...?\n")
+        for i, p in enumerate(sugerencias, start=1):
+            print(f"[{i}] {p.get_codigo():<10} {p.get_nombre()}")
+        print("[0] Ninguno")
+
+        opc = input("\nOpción: ")
+        if opc.isdigit() and 1 <= int(opc) <= len(sugerencias):
+            return sugerencias[int(opc) - 1]
+        return None
 
     def pantalla_eliminar(self):
         imprimir_encabezado("ELIMINAR PRODUCTO")
@@ -200,6 +228,8 @@ if __name__ == "__main__":
         imprimir_encabezado("DESCONTAR STOCK DE PRODUCTO")
         cod = input("Ingrese código del producto: ")
         prod = self.inv.buscarProducto(BusquedaPorCodigo(), cod)
+        if not prod:
+            prod = self.sugerir_producto(cod)
 
         if not prod:
             print("\nError: Producto no encontrado.")
@@ -232,7 +262,7 @@ if __name__ == "__main__":
 
     def pantalla_mostrar(self):
         imprimir_encabezado("INVENTARIO ACTUAL")
-        lista = self.inv.get_productos_raw()
+        lista = self.inv.get_productos()
         
         print(f"{'Código':<10} {'Nombre':<20} {'Categoría':<15} {'Precio':<10} {'Stock':<5}")
         print("-" * 65)
@@ -251,30 +281,23 @@ if __name__ == "__main__":
     def pantalla_ordenar(self):
         imprimir_encabezado("ORDENAR INVENTARIO")
         print("Seleccione criterio de orden:\n")
-        print("[1] Ordenar por STOCK (menor a mayor)")
-        print("[2] Ordenar por STOCK (mayor a menor)")
-        print("[3] Ordenar por PRECIO (menor a mayor)")
-        print("[4] Ordenar por PRECIO (mayor a menor)")
-        print("[5] Volver al menú")
+        opciones = list(CRITERIOS.values())
+        for n, entrada in enumerate(opciones, start=1):
+            print(f"[{n}] {entrada.etiqueta}")
+        print(f"[{len(opciones) + 1}] Volver al menú")
 
-        opc = input("\nOpción: ")
-        criterio = None
-        
-        if opc == '1': criterio = OrdenarPorStockAsc()
-        elif opc == '2': criterio = OrdenarPorStockDesc()
-        elif opc == '3': criterio = OrdenarPorPrecioAsc()
-        elif opc == '4': criterio = OrdenarPorPrecioDesc()
-        elif opc == '5': return
-
-        if criterio:
-            lista = self.inv.ordenarInventario(criterio)
-            print("\nMensaje: Inventario ordenado correctamente.")
-            print("\nListado (resumen):")
-            print(f"{'Código':<10} {'Nombre':<20} {'Categoría':<15} {'Precio':<10} {'Stock':<5}")
-            print("-" * 65)
-            for p in lista:
-                print(p.mostrarInfo())
-            pausa()
+        entrada = elegir_opcion(opciones, input("\nOpción: "))
+        if entrada is None:
+            return
+
+        lista = self.inv.ordenarInventario(entrada.fabrica())
+        print("\nMensaje: Inventario ordenado correctamente.")
+        print("\nListado (resumen):")
+        print(f"{'Código':<10} {'Nombre':<20} {'Categoría':<15} {'Precio':<10} {'Stock':<5}")
+        print("-" * 65)
+        for p in lista:
+            print(p.mostrarInfo())
+        pausa()
 
 
     def pantalla_importar(self):
@@ -284,21 +307,43 @@ if __name__ == "__main__":
         print("El archivo debe existir en su equipo.\n")
         
         ruta = input("Nombre del archivo: ").strip()
+
+        print("\n[1] Agregar sólo productos nuevos")
+        print("[2] Sincronizar (también actualiza stock y precio de los existentes)")
+        modo = input("\nOpción: ")
         
         print(f"\nBuscando archivo: {ruta} ...")
         time.sleep(0.5)
 
         try:
-            agregados, duplicados = self.inv.importarDesdeArchivo(ruta)
+            if modo == '2':
+                res = self.inv.sincronizarDesdeArchivo(ruta)
+            else:
+                agregados, duplicados = self.inv.importarDesdeArchivo(ruta)
+            reporte = self.inv.get_reporteImportacion()
             
             print("\nProcesando...")
             time.sleep(0.5)
             print("\nMensaje final:")
-            print(f"\"Importación completada. {agregados} nuevos agregados, {duplicados} omitidos por duplicidad.\"")
+            if modo == '2':
+                print(f"\"Sincronización completada. {res.get_agregados()} nuevos, {res.get_actualizados()} actualizados, "
+                      f"{res.get_sinCambios()} sin cambios, {res.get_ausentes()} ausentes en el archivo.\"")
+            else:
+                print(f"\"Importación completada. {agregados} nuevos agregados, {duplicados} omitidos por duplicidad.\"")
+
+            if reporte.get_totalRechazadas():
+                print(f"\nFilas rechazadas: {reporte.get_totalRechazadas()}")
+                for motivo, cantidad in reporte.resumen().items():
+                    print(f"  - {motivo} ({cantidad})")
+                print("\nPrimeras filas rechazadas:")
+                for fila, motivo in reporte.get_rechazos()[:5]:
+                    print(f"  Fila {fila}: {motivo}")
 
         except FileNotFoundError as e:
             print(f"\n[ERROR DE ARCHIVO]: {e}")
             print("Verifique que el nombre esté bien escrito y que el archivo exista.")
+        except ValueError as e:
+            print(f"\n[ERROR DE FORMATO]: {e}")
         except Exception as e:
             print(f"\n[ERROR INESPERADO]: Ocurrió un problema al leer el archivo.")
             print(f"Detalle: {e}")
@@ -313,7 +358,7 @@ if __name__ == "__main__":
         if ultima:
             print("Última acción registrada:")
             print(f"Detalle   : {ultima.get_descripcion()}")
-            print(f"Fecha/Hora: {ultima._fecha.strftime('%d/%m/%Y %H:%M')}")
+            print(f"Fecha/Hora: {ultima.get_fecha().strftime('%d/%m/%Y %H:%M')}")
             
             print("\n¿Desea revertir esta acción?")
             print("[1] Sí, deshacer")
@@ -331,10 +376,62 @@ if __name__ == "__main__":
         else:
             print("\nMensaje: No hay acciones disponibles para deshacer.")
         pausa()    
+
+    def avisar_alerta(self, alerta):
+        print(f"\n[ALERTA DE STOCK]: {alerta.codigo} {alerta.nombre} quedó en {alerta.cantidad} uds. "
+              f"(umbral {alerta.umbral}).")
+
+    def pantalla_alertas(self):
+        imprimir_encabezado("ALERTAS DE STOCK BAJO")
+        alertas = sorted(self.vigilante.get_alertas(), key=lambda a: a.cantidad - a.umbral)
+
+        if alertas:
+            print(f"{'Código':<10} {'Nombre':<20} {'Categoría':<15} {'Stock':>6} {'Umbral':>7}")
+            print("-" * 62)
+            for a in alertas:
+                print(f"{a.codigo:<10} {a.nombre:<20} {a.categoria:<15} {a.cantidad:>6} {a.umbral:>7}")
+        else:
+            print("Mensaje: Ningún producto está en su umbral de stock o por debajo.")
+
+        print("\n[1] Fijar umbral de un producto")
+        print("[2] Fijar umbral de una categoría")
+        print("[3] Volver al menú")
+        opc = input("\nOpción: ")
+        if opc not in ('1', '2'):
+            return
+
+        destino = input("\nCódigo del producto: " if opc == '1' else "\nCategoría: ")
+        umbral_str = input("Umbral (avisar con este stock o menos): ")
+        try:
+            if not umbral_str.strip().isdecimal():
+                raise ValueError("El umbral debe ser un número entero no negativo.")
+            if opc == '1':
+                if not self.inv.buscarProducto(BusquedaPorCodigo(), destino):
+                    raise ProductoNoEncontradoError(f"El código '{destino.strip()}' no existe en el inventario.")
+                self.vigilante.fijarUmbralProducto(destino, int(umbral_str))
+            else:
+                self.vigilante.fijarUmbralCategoria(destino, int(umbral_str))
+            print(f"\nMensaje: Umbral registrado. Alertas activas: {len(self.vigilante)}")
+        except ValueError as e:
+            print(f"\n[ERROR DE ENTRADA]: {e}")
+        except ProductoNoEncontradoError as e:
+            print(f"\n[ERROR]: {e}")
+        pausa()
         
 # =============================================================================
 # EJECUCIÓN
 # =============================================================================
-if __name__ == "__main__":
+def main(argumentos=()):
     app = InterfazConsola()
-    app.iniciar()
+    # El módulo de perfilado sólo se carga si se pidió; sin él la consola
+    # corre tal cual, sin envoltorios.
+    if "--perfil" in argumentos or os.environ.get("KIPUTECH_PERFIL", "") not in ("", "0"):
+        from perfilado import directorioPerfil, ejecutarConsola
+        ejecutarConsola(app, directorioPerfil(list(argumentos)))
+    else:
+        app.iniciar()
+
+
+if __name__ == "__main__":
+    import sys
+    main(sys.argv[1:])
@@ -1,42 +1,248 @@
 from abc import ABC, abstractmethod
-from datetime import datetime
-from dominio import StockInsuficienteError
+from array import array
+from collections import namedtuple
+from contextlib import ExitStack
+from operator import attrgetter
+from dominio import Producto, StockInsuficienteError, ProductoNoEncontradoError, ConflictoVersionError, COLUMNAS_PRODUCTO
+from reloj import ahora, aFecha, congelado
+from reservas import CONFIRMADA, CANCELADA
+from indices import IndiceTrigramas, IndicePrefijos
+# =============================================================================
+# REGISTRO DE ESTRATEGIAS
+# =============================================================================
+# Las estrategias de búsqueda y de orden se registran con un nombre corto y
+# el texto que muestran los menús. La consola arma sus pantallas recorriendo
+# el registro y la línea de comandos acepta esos nombres, así que una
+# estrategia nueva sólo necesita su clase y su decorador.
+
+EstrategiaRegistrada = namedtuple("EstrategiaRegistrada", "nombre etiqueta fabrica pregunta")
+
+BUSQUEDAS = {}  # nombre -> EstrategiaRegistrada, en orden de registro
+CRITERIOS = {}
+
+
+def registrarBusqueda(nombre, etiqueta, pregunta):
+    def registrar(fabrica):
+        BUSQUEDAS[nombre] = EstrategiaRegistrada(nombre, etiqueta, fabrica, pregunta)
+        return fabrica
+    return registrar
+
+
+def registrarCriterio(nombre, etiqueta):
+    def registrar(fabrica):
+        CRITERIOS[nombre] = EstrategiaRegistrada(nombre, etiqueta, fabrica, None)
+        return fabrica
+    return registrar
+
+
+def crearCriterio(texto):
+    """'categoria,precio-desc' -> criterio compuesto; un solo nombre, ese criterio."""
+    nombres = [n.strip() for n in texto.split(",") if n.strip()]
+    desconocidos = [n for n in nombres if n not in CRITERIOS]
+    if not nombres or desconocidos:
+        raise ValueError(f"Criterio de orden desconocido: {', '.join(desconocidos) or texto}. "
+                         f"Disponibles: {', '.join(CRITERIOS)}.")
+    criterios = [CRITERIOS[n].fabrica() for n in nombres]
+    return criterios[0] if len(criterios) == 1 else OrdenCompuesto(*criterios)
+
+
+def nombreCriterio(criterio):
+    """Inversa de crearCriterio(): el texto que vuelve a armar `criterio`."""
+    if isinstance(criterio, OrdenCompuesto):
+        return ",".join(nombreCriterio(c) for c in criterio.get_criterios())
+    return _nombreRegistrado(CRITERIOS, criterio)
+
+
+def nombreBusqueda(busqueda):
+    return _nombreRegistrado(BUSQUEDAS, busqueda)
+
+
+def _nombreRegistrado(registro, estrategia):
+    for nombre, registrada in registro.items():
+        if registrada.fabrica is type(estrategia):
+            return nombre
+    raise ValueError(f"Estrategia no registrada: {type(estrategia).__name__}.")
+
 # =============================================================================
 # ESTRATEGIAS DE BÚSQUEDA
 # =============================================================================
 class Busqueda(ABC):
+    # Nombre del índice del inventario que la estrategia sabe aprovechar.
+    # Si el inventario lo mantiene, se llama a buscarEnIndice() en lugar de
+    # recorrer la lista con buscar().
+    indice = None
+
     @abstractmethod
     def buscar(self, lista_productos, valor): pass
 
+@registrarBusqueda("codigo", "Buscar por CÓDIGO (Ver todos los detalles)", "Ingrese código del producto: ")
 class BusquedaPorCodigo(Busqueda):
+    indice = "codigos"
+
     def buscar(self, lista_productos, valor):
         for p in lista_productos:
             if p.get_codigo().strip().upper() == valor.strip().upper():
                 return p
         return None
 
+    def buscarEnIndice(self, indice, valor):
+        return indice.buscar(valor)
+
+@registrarBusqueda("nombre", "Buscar por NOMBRE (Ver lista resumen)", "Ingrese nombre del producto: ")
 class BusquedaPorNombre(Busqueda):
     def buscar(self, lista_productos, valor):
-        return [p for p in lista_productos if valor.lower() in p.get_nombre().lower()]
+        valor = valor.lower()
+        return [p for p in lista_productos if valor in p.get_claveNombre()]
+
+@registrarBusqueda("difusa", "Buscar por NOMBRE aproximado (tolera errores de tipeo)", "Ingrese nombre aproximado: ")
+class BusquedaDifusa(Busqueda):
+    """Búsqueda por nombre tolerante a errores de tipeo, ordenada por similitud."""
+    indice = "trigramas"
+
+    def __init__(self, limite=10, umbral=0.4, maxCandidatos=50000):
+        self.__limite = limite
+        self.__umbral = umbral
+        self.__maxCandidatos = maxCandidatos
+
+    def buscar(self, lista_productos, valor):
+        temporal = IndiceTrigramas()
+        for p in lista_productos:
+            temporal.agregar(p)
+        temporal.consolidar()
+        return self.buscarEnIndice(temporal, valor)
+
+    def buscarEnIndice(self, indice, valor):
+        return indice.buscar(valor, self.__limite, self.__umbral, self.__maxCandidatos)
+
+@registrarBusqueda("prefijo", "Autocompletar por inicio de CÓDIGO o NOMBRE", "Ingrese el comienzo del código o nombre: ")
+class BusquedaPorPrefijo(Busqueda):
+    """Autocompletado: primeros productos cuyo código o nombre empieza con el texto."""
+    indice = "prefijos"
+
+    def __init__(self, limite=5):
+        self.__limite = limite
+
+    def buscar(self, lista_productos, valor):
+        temporal = IndicePrefijos()
+        for p in lista_productos:
+            temporal.agregar(p)
+        temporal.consolidar()
+        return self.buscarEnIndice(temporal, valor)
+
+    def buscarEnIndice(self, indice, valor):
+        return indice.sugerir(valor, self.__limite)
 
 # =============================================================================
 # ESTRATEGIAS DE ORDENAMIENTO
 # =============================================================================
+# compilarClave() devuelve la función que recibe sorted(): si el campo tiene
+# columna en COLUMNAS_PRODUCTO es un operator.attrgetter sobre el slot (se
+# resuelve en C, sin llamar a métodos); si no, el propio clave(). `indice`
+# es el índice del inventario que ya entrega productos en ese orden.
 class CriterioOrdenamiento(ABC):
+    campo = None
+    descendente = False
+    numerico = False  # la clave se puede negar para invertir el orden
+    indice = None
+
     @abstractmethod
-    def ordenar(self, lista_productos): pass
+    def clave(self, producto): pass
 
+    def compilarClave(self):
+        columna = COLUMNAS_PRODUCTO.get(self.campo)
+        return attrgetter(columna) if columna else self.clave
+
+    def ordenar(self, lista_productos):
+        return sorted(lista_productos, key=self.compilarClave(), reverse=self.descendente)
+
+@registrarCriterio("stock-asc", "Ordenar por STOCK (menor a mayor)")
 class OrdenarPorStockAsc(CriterioOrdenamiento):
-    def ordenar(self, lista_productos): return sorted(lista_productos, key=lambda p: p.get_cantidad())
+    campo = "stock"
+    numerico = True
+    def clave(self, producto): return producto.get_cantidad()
 
+@registrarCriterio("stock-desc", "Ordenar por STOCK (mayor a menor)")
 class OrdenarPorStockDesc(CriterioOrdenamiento):
-    def ordenar(self, lista_productos): return sorted(lista_productos, key=lambda p: p.get_cantidad(), reverse=True)
+    campo = "stock"
+    descendente = True
+    numerico = True
+    def clave(self, producto): return producto.get_cantidad()
 
+@registrarCriterio("precio-asc", "Ordenar por PRECIO (menor a mayor)")
 class OrdenarPorPrecioAsc(CriterioOrdenamiento):
-    def ordenar(self, lista_productos): return sorted(lista_productos, key=lambda p: p.get_precio())
+    campo = "precio"
+    numerico = True
+    indice = "precio"
+    def clave(self, producto): return producto.get_centimos()
 
+@registrarCriterio("precio-desc", "Ordenar por PRECIO (mayor a menor)")
 class OrdenarPorPrecioDesc(CriterioOrdenamiento):
-    def ordenar(self, lista_productos): return sorted(lista_productos, key=lambda p: p.get_precio(), reverse=True)
+    campo = "precio"
+    descendente = True
+    numerico = True
+    def clave(self, producto): return producto.get_centimos()
+
+@registrarCriterio("categoria", "Ordenar por CATEGORÍA (A-Z)")
+class OrdenarPorCategoria(CriterioOrdenamiento):
+    campo = "categoria"
+    # La clave en minúsculas ya está calculada en la tabla de categorías.
+    def clave(self, producto): return producto.get_claveCategoria()
+
+    def compilarClave(self):
+        return Producto.get_claveCategoria
+
+
+class _Invertido:
+    """Envuelve una clave no numérica para que compare al revés."""
+    __slots__ = ("valor",)
+
+    def __init__(self, valor): self.valor = valor
+    def __lt__(self, otro): return otro.valor < self.valor
+    def __eq__(self, otro): return self.valor == otro.valor
+
+
+class OrdenCompuesto(CriterioOrdenamiento):
+    """
+    Varios criterios en un solo sorted(): el primero manda y los siguientes
+    desempatan. El sentido del primero es el del orden completo; los que van
+    en sentido contrario se niegan (o se invierten si no son numéricos).
+    """
+
+    def __init__(self, *criterios):
+        if not criterios:
+            raise ValueError("Se necesita al menos un criterio de orden.")
+        self.__criterios = criterios
+        self.campo = ",".join(c.campo for c in criterios)
+        self.descendente = criterios[0].descendente
+
+    def get_criterios(self):
+        return self.__criterios
+
+    def compilarClave(self):
+        columnas = [COLUMNAS_PRODUCTO.get(c.campo) for c in self.__criterios]
+        if all(columnas) and all(c.descendente == self.descendente for c in self.__criterios):
+            # Todas las columnas en el mismo sentido: una tupla armada en C.
+            return attrgetter(*columnas)
+        funciones = []
+        for criterio in self.__criterios:
+            clave = criterio.compilarClave()
+            if criterio.descendente != self.descendente:
+                if criterio.numerico:
+                    clave = (lambda c: lambda p: -c(p))(clave)
+                else:
+                    clave = (lambda c: lambda p: _Invertido(c(p)))(clave)
+            funciones.append(clave)
+        if len(funciones) == 2:
+            primera, segunda = funciones
+            return lambda p: (primera(p), segunda(p))
+        return lambda p: tuple([f(p) for f in funciones])
+
+    def clave(self, producto):
+        return self.compilarClave()(producto)
+
+
+registrarCriterio("categoria,precio-desc", "Ordenar por CATEGORÍA y luego PRECIO (mayor a menor)")(
+    lambda: OrdenCompuesto(OrdenarPorCategoria(), OrdenarPorPrecioDesc()))
 
 
 # =============================================================================
@@ -44,7 +250,10 @@ class OrdenarPorPrecioDesc(CriterioOrdenamiento):
 # =============================================================================
 class Accion(ABC):
     def __init__(self):
-        self._fecha = datetime.now()
+        self._marca = ahora()
+
+    def get_fecha(self):
+        return aFecha(self._marca)
 
     @abstractmethod
     def ejecutar(self, inventario): pass
@@ -61,12 +270,14 @@ class AccionAgregarProducto(Accion):
         super().__init__()
         self.__producto = producto
 
+    def get_producto(self):
+        return self.__producto
+
     def ejecutar(self, inventario):
-        inventario.get_productos_raw().append(self.__producto)
+        inventario._insertar(self.__producto)
 
     def revertir(self, inventario):
-        if self.__producto in inventario.get_productos_raw():
-            inventario.get_productos_raw().remove(self.__producto)
+        inventario._retirar(self.__producto)
 
     def get_descripcion(self):
         return f"Agregado: {self.__producto.get_nombre()}"
@@ -78,34 +289,271 @@ class AccionEliminarProducto(Accion):
         self.__producto = producto
 
     def ejecutar(self, inventario):
-        if self.__producto in inventario.get_productos_raw():
-            inventario.get_productos_raw().remove(self.__producto)
+        inventario._retirar(self.__producto)
 
     def revertir(self, inventario):
-        inventario.get_productos_raw().append(self.__producto)
+        inventario._insertar(self.__producto)
 
     def get_descripcion(self):
         return f"Eliminación: {self.__producto.get_nombre()}"
 
 
 class AccionDescontarStock(Accion):
-    def __init__(self, producto, cantidad):
+    def __init__(self, producto, cantidad, version=None):
         super().__init__()
         self.__producto = producto
         self.__cantidad_descontada = cantidad
+        self.__version = version
         self.__stock_anterior = 0
 
     def ejecutar(self, inventario):
+        # Con version, sólo se descuenta si nadie tocó el producto desde que
+        # se leyó (compare-and-set); sin ella se descuenta sobre lo actual.
+        if self.__version is not None and self.__producto.get_version() != self.__version:
+            raise ConflictoVersionError(self.__producto.get_codigo(), self.__version, self.__producto.get_version())
         self.__stock_anterior = self.__producto.get_cantidad()
 
-        if self.__producto.get_cantidad() < self.__cantidad_descontada:
-            raise StockInsuficienteError(self.__producto.get_cantidad(), self.__cantidad_descontada)
+        # Las unidades reservadas por otros vendedores no se pueden vender.
+        if self.__producto.get_disponible() < self.__cantidad_descontada:
+            raise StockInsuficienteError(self.__producto.get_disponible(), self.__cantidad_descontada)
 
         nuevo = self.__stock_anterior - self.__cantidad_descontada
         self.__producto.actualizarStock(nuevo)
+        inventario._registrarDemanda(self.__producto, self.__cantidad_descontada, self._marca)
 
     def revertir(self, inventario):
         self.__producto.actualizarStock(self.__stock_anterior)
+        inventario._registrarDemanda(self.__producto, -self.__cantidad_descontada, self._marca)
+
+    def get_descripcion(self):
+        return f"Stock descontado: {self.__cantidad_descontada} uds. a {self.__producto.get_nombre()}"
+
+
+class AccionActualizarProducto(Accion):
+    def __init__(self, producto, cantidad, centimos):
+        super().__init__()
+        self.__producto = producto
+        self.__cantidad = cantidad
+        self.__centimos = centimos
+        self.__cantidad_anterior = producto.get_cantidad()
+        self.__centimos_anterior = producto.get_centimos()
+
+    def ejecutar(self, inventario):
+        self.__cantidad_anterior = self.__producto.get_cantidad()
+        self.__centimos_anterior = self.__producto.get_centimos()
+        if self.__cantidad != self.__cantidad_anterior:
+            self.__producto.actualizarStock(self.__cantidad)
+        if self.__centimos != self.__centimos_anterior:
+            self.__producto.set_centimos(self.__centimos)
+
+    def revertir(self, inventario):
+        if self.__producto.get_cantidad() != self.__cantidad_anterior:
+            self.__producto.actualizarStock(self.__cantidad_anterior)
+        if self.__producto.get_centimos() != self.__centimos_anterior:
+            self.__producto.set_centimos(self.__centimos_anterior)
+
+    def get_descripcion(self):
+        return f"Actualizado: {self.__producto.get_nombre()}"
+
+
+class AccionSincronizacion(Accion):
+    """Todas las altas/cambios/bajas de una sincronización se deshacen juntas."""
+
+    def __init__(self, acciones, cambios_huellas, ruta):
+        super().__init__()
+        self.__acciones = acciones
+        # codigo -> (huella anterior, huella nueva); None si no existía / se quita.
+        self.__cambios_huellas = cambios_huellas
+        self.__ruta = ruta
+
+    def ejecutar(self, inventario):
+        for accion in self.__acciones:
+            accion.ejecutar(inventario)
+        inventario._aplicarHuellas((c, nueva) for c, (_, nueva) in self.__cambios_huellas.items())
+
+    def revertir(self, inventario):
+        for accion in reversed(self.__acciones):
+            accion.revertir(inventario)
+        inventario._aplicarHuellas((c, anterior) for c, (anterior, _) in self.__cambios_huellas.items())
+
+    def get_descripcion(self):
+        return f"Sincronización: {len(self.__acciones)} cambios desde {self.__ruta}"
+
+
+
+class AccionReservarStock(Accion):
+    def __init__(self, producto, cantidad, duracion):
+        super().__init__()
+        self.__producto = producto
+        self.__cantidad = cantidad
+        self.__duracion = duracion
+        self.__reserva = None
+
+    def get_reserva(self): return self.__reserva
+
+    def ejecutar(self, inventario):
+        self.__reserva = inventario._get_gestorReservas().crear(self.__producto, self.__cantidad, self.__duracion)
+
+    def revertir(self, inventario):
+        # Si ya venció no queda nada que liberar.
+        if self.__reserva.esta_activa():
+            inventario._get_gestorReservas().cerrar(self.__reserva, CANCELADA)
+
+    def get_descripcion(self):
+        return f"Reserva #{self.__reserva.get_id()}: {self.__cantidad} uds. de {self.__producto.get_nombre()}"
+
+
+class AccionConfirmarReserva(Accion):
+    def __init__(self, reserva):
+        super().__init__()
+        self.__reserva = reserva
+        self.__stock_anterior = 0
+
+    def get_reserva(self): return self.__reserva
+
+    def ejecutar(self, inventario):
+        producto = self.__reserva.get_producto()
+        inventario._get_gestorReservas().cerrar(self.__reserva, CONFIRMADA)
+        self.__stock_anterior = producto.get_cantidad()
+        producto.actualizarStock(self.__stock_anterior - self.__reserva.get_cantidad())
+        inventario._registrarDemanda(producto, self.__reserva.get_cantidad(), self._marca)
+
+    def revertir(self, inventario):
+        self.__reserva.get_producto().actualizarStock(self.__stock_anterior)
+        inventario._registrarDemanda(self.__reserva.get_producto(), -self.__reserva.get_cantidad(), self._marca)
+        inventario._get_gestorReservas().activar(self.__reserva)
+
+    def get_descripcion(self):
+        return (f"Reserva #{self.__reserva.get_id()} confirmada: {self.__reserva.get_cantidad()} uds. "
+                f"a {self.__reserva.get_producto().get_nombre()}")
+
+
+class AccionCancelarReserva(Accion):
+    def __init__(self, reserva):
+        super().__init__()
+        self.__reserva = reserva
+
+    def get_reserva(self): return self.__reserva
+
+    def ejecutar(self, inventario):
+        inventario._get_gestorReservas().cerrar(self.__reserva, CANCELADA)
+
+    def revertir(self, inventario):
+        inventario._get_gestorReservas().activar(self.__reserva)
+
+    def get_descripcion(self):
+        return f"Reserva #{self.__reserva.get_id()} cancelada"
+
+
+
+class AccionActualizacionLote(Accion):
+    """Cambia un mismo campo de muchos productos como una sola acción reversible."""
+    # campo -> (tipo del arreglo, lectura, escritura)
+    CAMPOS = {
+        "cantidad": ("q", Producto.get_cantidad, Producto.actualizarStock),
+        "precio": ("q", Producto.get_centimos, Producto.set_centimos),
+    }
+
+    def __init__(self, productos, campo, nuevos):
+        super().__init__()
+        if campo not in self.CAMPOS:
+            raise ValueError(f"Campo no actualizable en lote: {campo}")
+        self.__productos = tuple(productos)
+        self.__campo = campo
+        tipo = self.CAMPOS[campo][0]
+        # Valores anteriores y nuevos en arreglos compactos, no un objeto por producto.
+        self.__nuevos = array(tipo, nuevos)
+        self.__anteriores = array(tipo)
+        if len(self.__nuevos) != len(self.__productos):
+            raise ValueError("Debe haber un valor nuevo por cada producto.")
+
+    def ejecutar(self, inventario):
+        tipo, leer, _ = self.CAMPOS[self.__campo]
+        self.__anteriores = array(tipo, map(leer, self.__productos))
+        self.__aplicar(self.__nuevos)
+
+    def revertir(self, inventario):
+        self.__aplicar(self.__anteriores)
+
+    def __aplicar(self, valores):
+        escribir = self.CAMPOS[self.__campo][2]
+        marca = ahora()
+        for producto, valor in zip(self.__productos, valores):
+            escribir(producto, valor, marca)
+
+    def get_descripcion(self):
+        return f"Actualización en lote de {self.__campo}: {len(self.__productos)} productos"
+
+
+class AccionTransferencia(Accion):
+    """Mueve unidades de un producto entre dos almacenes de una RedAlmacenes."""
+
+    def __init__(self, codigo, origen, destino, cantidad):
+        super().__init__()
+        self.__codigo = codigo
+        self.__origen = origen
+        self.__destino = destino
+        self.__cantidad = cantidad
+        self.__creado = None
+
+    def __bloquear(self, red):
+        # La verificación de stock y el movimiento ocurren con ambos almacenes
+        # bloqueados, siempre en el mismo orden (por nombre) para que dos
+        # transferencias cruzadas no se esperen mutuamente.
+        pila = ExitStack()
+        for ubicacion in sorted((self.__origen, self.__destino)):
+            pila.enter_context(red.get_almacen(ubicacion)._get_candadoEscritura())
+        return pila
+
+    def ejecutar(self, red):
+        with self.__bloquear(red):
+            self.__ejecutar(red)
+
+    def __ejecutar(self, red):
+        inv_origen = red.get_almacen(self.__origen)
+        inv_destino = red.get_almacen(self.__destino)
+        inv_origen.liberarReservasVencidas()
+
+        producto = inv_origen.get_indice("codigos").buscar(self.__codigo)
+        if producto is None:
+            raise ProductoNoEncontradoError(f"El código '{self.__codigo}' no existe en {self.__origen}.")
+        if producto.get_disponible() < self.__cantidad:
+            raise StockInsuficienteError(producto.get_disponible(), self.__cantidad)
+
+        recibido = inv_destino.get_indice("codigos").buscar(self.__codigo)
+        if recibido is None:
+            # Primera vez que el destino recibe este producto: se da de alta
+            # con stock 0 y se quita al deshacer.
+            recibido = Producto(producto.get_nombre(), producto.get_categoria(), 0,
+                                codigo=producto.get_codigo(), centimos=producto.get_centimos())
+            inv_destino._insertar(recibido)
+            self.__creado = recibido
+
+        self.__mover(producto, recibido, self.__cantidad)
+
+    def revertir(self, red):
+        with self.__bloquear(red):
+            self.__revertir(red)
+
+    def __revertir(self, red):
+        producto = red.get_almacen(self.__origen).get_indice("codigos").buscar(self.__codigo)
+        recibido = red.get_almacen(self.__destino).get_indice("codigos").buscar(self.__codigo)
+        if producto is None:
+            raise ProductoNoEncontradoError(f"El código '{self.__codigo}' ya no existe en {self.__origen}.")
+        # Si el destino ya vendió parte de lo recibido no hay qué devolver.
+        if recibido is None or recibido.get_disponible() < self.__cantidad:
+            raise StockInsuficienteError(0 if recibido is None else recibido.get_disponible(), self.__cantidad)
+
+        self.__mover(recibido, producto, self.__cantidad)
+        if self.__creado is not None:
+            red.get_almacen(self.__destino)._retirar(self.__creado)
+            self.__creado = None
+
+    def __mover(self, desde, hacia, cantidad):
+        # Los movimientos son relativos: no pisan ventas hechas mientras tanto.
+        with congelado():
+            desde.actualizarStock(desde.get_cantidad() - cantidad)
+            hacia.actualizarStock(hacia.get_cantidad() + cantidad)
 
     def get_descripcion(self):
-        return f"Stock descontado: {self.__cantidad_descontada} uds. a {self.__producto.get_nombre()}"
\ No newline at end of file
+        return f"Transferencia: {self.__cantidad} uds. de {self.__codigo} ({self.__origen} -> {self.__destino})"
@@ -0,0 +1,184 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+# =============================================================================
+# MODO PERFILADO DE LA CONSOLA
+# =============================================================================
+# Se activa con la variable de entorno KIPUTECH_PERFIL=<directorio> o con
+# `--perfil [directorio]` al lanzar la consola. Si no se activa, este módulo
+# ni siquiera se importa: la consola corre sin envoltorios.
+#
+# Con el modo activo cada pantalla_* de la consola se envuelve y por cada
+# operación se registra:
+#   - tiempo de pared y cantidad de llamadas/tiempo de cada método público
+#     del Inventario invocado debajo de ella;
+#   - memoria asignada (tracemalloc): neto y pico durante la operación;
+#   - un perfil cProfile (<n>_<pantalla>.prof, se abre con pstats/snakeviz);
+#   - muestras de la pila cada INTERVALO_MUESTREO segundos, acumuladas en
+#     pilas.collapsed (formato "a;b;c cantidad" de flamegraph.pl/speedscope).
+# Al salir se escribe operaciones.txt con el resumen de la sesión.
+
+VARIABLE_ENTORNO = "KIPUTECH_PERFIL"
+DIRECTORIO_POR_DEFECTO = "perfiles"
+INTERVALO_MUESTREO = 0.001
+
+
+def directorioPerfil(argumentos):
+    """Devuelve el directorio de salida si el modo perfilado está pedido, o None."""
+    if "--perfil" in argumentos:
+        i = argumentos.index("--perfil")
+        siguiente = argumentos[i + 1] if i + 1 < len(argumentos) else ""
+        return siguiente if siguiente and not siguiente.startswith("-") else DIRECTORIO_POR_DEFECTO
+    valor = os.environ.get(VARIABLE_ENTORNO, "")
+    if valor in ("", "0"):
+        return None
+    return DIRECTORIO_POR_DEFECTO if valor == "1" else valor
+
+
+class RegistroOperacion:
+    def __init__(self, numero, nombre):
+        self.numero = numero
+        self.nombre = nombre
+        self.segundos = 0.0
+        self.memoriaNeta = 0
+        self.memoriaPico = 0
+        self.llamadas = {}  # metodo -> [cantidad, segundos]
+
+    def registrarLlamada(self, metodo, segundos):
+        acumulado = self.llamadas.setdefault(metodo, [0, 0.0])
+        acumulado[0] += 1
+        acumulado[1] += segundos
+
+
+class MuestreadorPila:
+    """Hilo que toma la pila del hilo principal a intervalos fijos."""
+
+    def __init__(self, intervalo=INTERVALO_MUESTREO):
+        self.__intervalo = intervalo
+        self.__pilas = Counter()
+        self.__hilo = None
+        self.__detener = threading.Event()
+        self.__objetivo = threading.main_thread().ident
+
+    def get_pilas(self):
+        return self.__pilas
+
+    def iniciar(self):
+        self.__detener.clear()
+        self.__hilo = threading.Thread(target=self.__muestrear, daemon=True)
+        self.__hilo.start()
+
+    def detener(self):
+        self.__detener.set()
+        if self.__hilo is not None:
+            self.__hilo.join()
+            self.__hilo = None
+
+    def __muestrear(self):
+        # Se omiten los marcos del propio perfilador y de cProfile.
+        omitidos = {os.path.abspath(__file__), os.path.abspath(sys.modules["cProfile"].__file__)}
+        while not self.__detener.wait(self.__intervalo):
+            marco = sys._current_frames().get(self.__objetivo)
+            pila = []
+            while marco is not None:
+                codigo = marco.f_code
+                if os.path.abspath(codigo.co_filename) not in omitidos:
+                    pila.append(f"{os.path.basename(codigo.co_filename)}:{codigo.co_name}")
+                marco = marco.f_back
+            self.__pilas[";".join(reversed(pila))] += 1
+
+
+class Perfilador:
+    def __init__(self, directorio):
+        self.__directorio = directorio
+        self.__operaciones = []
+        self.__actual = None
+        self.__muestreador = MuestreadorPila()
+        os.makedirs(directorio, exist_ok=True)
+
+    def get_operaciones(self):
+        return self.__operaciones
+
+    def instrumentar(self, consola):
+        # Se reemplazan los métodos en la instancia, no en la clase: otras
+        # consolas del mismo proceso quedan sin tocar.
+        for nombre in dir(consola):
+            if nombre.startswith("pantalla_"):
+                setattr(consola, nombre, self.__envolverPantalla(nombre, getattr(consola, nombre)))
+        self.instrumentarInventario(consola.inv)
+
+    def instrumentarInventario(self, inventario):
+        for nombre in dir(type(inventario)):
+            if nombre.startswith("_") or not callable(getattr(inventario, nombre)):
+                continue
+            setattr(inventario, nombre, self.__envolverMetodo(nombre, getattr(inventario, nombre)))
+
+    def __envolverMetodo(self, nombre, metodo):
+        def envoltorio(*args, **kwargs):
+            registro = self.__actual
+            if registro is None:
+                return metodo(*args, **kwargs)
+            inicio = time.perf_counter()
+            try:
+                return metodo(*args, **kwargs)
+            finally:
+                registro.registrarLlamada(nombre, time.perf_counter() - inicio)
+        return envoltorio
+
+    def __envolverPantalla(self, nombre, pantalla):
+        def envoltorio(*args, **kwargs):
+            if self.__actual is not None:
+                # Pantalla llamada desde otra: se mide como parte de la exterior.
+                return pantalla(*args, **kwargs)
+            return self.__medir(nombre, pantalla, args, kwargs)
+        return envoltorio
+
+    def __medir(self, nombre, pantalla, args, kwargs):
+        import cProfile
+        import tracemalloc
+
+        registro = RegistroOperacion(len(self.__operaciones) + 1, nombre)
+        self.__actual = registro
+        perfil = cProfile.Profile()
+        tracemalloc.start()
+        base = tracemalloc.get_traced_memory()[0]
+        self.__muestreador.iniciar()
+        inicio = time.perf_counter()
+        try:
+            return perfil.runcall(pantalla, *args, **kwargs)
+        finally:
+            registro.segundos = time.perf_counter() - inicio
+            self.__muestreador.detener()
+            actual, pico = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            registro.memoriaNeta = actual - base
+            registro.memoriaPico = pico - base
+            perfil.dump_stats(os.path.join(self.__directorio, f"{registro.numero:03d}_{nombre}.prof"))
+            self.__operaciones.append(registro)
+            self.__actual = None
+
+    def guardar(self):
+        with open(os.path.join(self.__directorio, "pilas.collapsed"), "w", encoding="utf-8") as f:
+            for pila, cantidad in sorted(self.__muestreador.get_pilas().items()):
+                f.write(f"{pila} {cantidad}\n")
+
+        with open(os.path.join(self.__directorio, "operaciones.txt"), "w", encoding="utf-8") as f:
+            f.write(f"{'N°':<5} {'Operación':<22} {'Tiempo (ms)':>12} {'Mem. neta (KB)':>15} {'Mem. pico (KB)':>15}\n")
+            for r in self.__operaciones:
+                f.write(f"{r.numero:<5} {r.nombre:<22} {r.segundos * 1000:>12.2f} "
+                        f"{r.memoriaNeta / 1024:>15.1f} {r.memoriaPico / 1024:>15.1f}\n")
+                for metodo, (cantidad, segundos) in sorted(r.llamadas.items(), key=lambda e: -e[1][1]):
+                    f.write(f"{'':<5}   Inventario.{metodo:<28} {cantidad:>6} llamadas {segundos * 1000:>10.2f} ms\n")
+
+
+def ejecutarConsola(consola, directorio):
+    perfilador = Perfilador(directorio)
+    perfilador.instrumentar(consola)
+    try:
+        consola.iniciar()
+    finally:
+        perfilador.guardar()
+        print(f"Perfil de la sesión guardado en '{directorio}'.")
@@ -0,0 +1,63 @@
+import threading
+import time
+from contextlib import contextmanager
+
+# =============================================================================
+# RELOJ DEL INVENTARIO
+# =============================================================================
+# Productos y acciones guardan sus fechas como un entero: microsegundos desde
+# la época (marca). Leer el reloj así es mucho más barato que construir un
+# datetime, y el datetime sólo se arma cuando la consola lo muestra (aFecha).
+#
+# Las marcas nunca retroceden aunque el reloj del sistema se ajuste hacia
+# atrás, así que ordenar por marca respeta el orden en que ocurrieron los
+# cambios. Dentro de `congelado()` todas las lecturas devuelven la misma
+# marca: una importación o una actualización en lote consulta el reloj una
+# sola vez en lugar de una vez por producto. La marca fija es de cada hilo:
+# un lote congelado en un hilo no detiene el reloj de los demás.
+
+class Reloj:
+    def __init__(self, fuente=time.time_ns):
+        self.__fuente = fuente
+        self.__ultima = 0
+        self.__hilo = threading.local()
+
+    def ahora(self):
+        fija = getattr(self.__hilo, "fija", None)
+        if fija is not None:
+            return fija
+        marca = self.__fuente() // 1000
+        if marca < self.__ultima:
+            marca = self.__ultima
+        self.__ultima = marca
+        return marca
+
+    @contextmanager
+    def congelado(self):
+        hilo = self.__hilo
+        fija = getattr(hilo, "fija", None)
+        if fija is not None:
+            # Un lote dentro de otro comparte la marca del exterior.
+            yield fija
+            return
+        hilo.fija = fija = self.ahora()
+        try:
+            yield fija
+        finally:
+            hilo.fija = None
+
+
+RELOJ = Reloj()
+
+
+def ahora():
+    return RELOJ.ahora()
+
+
+def congelado():
+    return RELOJ.congelado()
+
+
+def aFecha(marca):
+    from datetime import datetime  # Sólo al mostrar una fecha.
+    return datetime.fromtimestamp(marca / 1_000_000)
@@ -0,0 +1,129 @@
+import heapq
+import time
+from itertools import chain
+from dominio import InventarioError, StockInsuficienteError
+
+# =============================================================================
+# RESERVAS DE STOCK
+# =============================================================================
+# Una reserva aparta unidades de un producto por un tiempo sin descontarlas:
+# el resto de vendedores sólo ve el stock disponible (cantidad - reservado).
+# Los vencimientos se guardan en un montículo ordenado por fecha de
+# expiración, así que liberar las reservas vencidas cuesta O(log n) por
+# reserva; las que ya se confirmaron o cancelaron se descartan al salir.
+
+ACTIVA = "activa"
+CONFIRMADA = "confirmada"
+CANCELADA = "cancelada"
+VENCIDA = "vencida"
+
+
+class ReservaNoActivaError(InventarioError):
+    pass
+
+
+class Reserva:
+    def __init__(self, id_reserva, producto, cantidad, expira):
+        self.__id = id_reserva
+        self.__producto = producto
+        self.__cantidad = cantidad
+        self.__expira = expira
+        self.__estado = ACTIVA
+
+    def get_id(self): return self.__id
+    def get_producto(self): return self.__producto
+    def get_cantidad(self): return self.__cantidad
+    def get_expira(self): return self.__expira
+    def get_estado(self): return self.__estado
+
+    def esta_activa(self):
+        return self.__estado == ACTIVA
+
+    def _set_estado(self, estado):
+        self.__estado = estado
+
+    def _desplazar(self, segundos):
+        self.__expira += segundos
+
+
+class GestorReservas:
+    def __init__(self, reloj=time.monotonic):
+        self.__reloj = reloj
+        self.__reservas = {}
+        self.__vencimientos = []
+        self.__ultimoId = 0
+
+    def get_reserva(self, id_reserva):
+        # Sólo se guardan las reservas activas; las cerradas viven en el
+        # historial de acciones mientras se puedan deshacer.
+        reserva = self.__reservas.get(id_reserva)
+        if reserva is None:
+            raise ReservaNoActivaError(f"No existe una reserva activa con id {id_reserva}.")
+        return reserva
+
+    def get_totalActivas(self):
+        return len(self.__reservas)
+
+    def crear(self, producto, cantidad, duracion):
+        self.liberarVencidas()
+        if cantidad <= 0:
+            raise ValueError("La cantidad a reservar debe ser mayor a 0.")
+        if producto.get_disponible() < cantidad:
+            raise StockInsuficienteError(producto.get_disponible(), cantidad)
+
+        self.__ultimoId += 1
+        reserva = Reserva(self.__ultimoId, producto, cantidad, self.__reloj() + duracion)
+        self.activar(reserva)
+        return reserva
+
+    def activar(self, reserva):
+        reserva.get_producto()._ajustarReservado(reserva.get_cantidad())
+        reserva._set_estado(ACTIVA)
+        self.__reservas[reserva.get_id()] = reserva
+        heapq.heappush(self.__vencimientos, (reserva.get_expira(), reserva.get_id()))
+
+    def cerrar(self, reserva, estado):
+        if not reserva.esta_activa():
+            raise ReservaNoActivaError(f"La reserva {reserva.get_id()} ya está {reserva.get_estado()}.")
+        reserva.get_producto()._ajustarReservado(-reserva.get_cantidad())
+        reserva._set_estado(estado)
+        del self.__reservas[reserva.get_id()]
+        self.__compactar()
+
+    def liberarVencidas(self):
+        ahora = self.__reloj()
+        vencidas = 0
+        while self.__vencimientos and self.__vencimientos[0][0] <= ahora:
+            _, id_reserva = heapq.heappop(self.__vencimientos)
+            reserva = self.__reservas.get(id_reserva)
+            if reserva is not None and reserva.get_expira() <= ahora:
+                self.cerrar(reserva, VENCIDA)
+                vencidas += 1
+        return vencidas
+
+    # ---- Persistencia ----
+    def get_estadoPersistente(self):
+        """Reservas activas y último id, con la hora en que se guardaron."""
+        return {"activas": list(self.__reservas.values()), "ultimoId": self.__ultimoId,
+                "reloj": self.__reloj(), "pared": time.time()}
+
+    def restaurar(self, datos, cerradas=()):
+        # El reloj es monotónico y no sigue entre procesos: los vencimientos
+        # se corren para que a cada reserva le quede lo que le quedaba al
+        # guardar, menos el tiempo real que pasó desde entonces. `cerradas`
+        # son las del historial, que pueden volver a activarse al deshacer.
+        # El reservado de cada producto ya viene guardado con el producto.
+        desfase = self.__reloj() - datos["reloj"] - max(0.0, time.time() - datos["pared"])
+        for reserva in {id(r): r for r in chain(datos["activas"], cerradas)}.values():
+            reserva._desplazar(desfase)
+        self.__ultimoId = datos["ultimoId"]
+        self.__reservas = {r.get_id(): r for r in datos["activas"]}
+        self.__vencimientos = [(r.get_expira(), r.get_id()) for r in datos["activas"]]
+        heapq.heapify(self.__vencimientos)
+
+    def __compactar(self):
+        # Las entradas de reservas ya cerradas quedan en el montículo hasta
+        # vencer; si pasan a ser mayoría se reconstruye para no acumularlas.
+        if len(self.__vencimientos) > 64 and len(self.__vencimientos) > 2 * len(self.__reservas):
+            self.__vencimientos = [(r.get_expira(), r.get_id()) for r in self.__reservas.values()]
+            heapq.heapify(self.__vencimientos)
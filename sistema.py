@@ -1,93 +1,708 @@
+import operator
 import os
-import csv
-from datetime import datetime
-from dominio import Producto, ProductoNoEncontradoError, HistorialVacioError
-from negocio import AccionAgregarProducto, AccionEliminarProducto, AccionDescontarStock, BusquedaPorCodigo
+import threading
+from decimal import Decimal, ROUND_HALF_UP
+from reloj import ahora, aFecha, congelado
+from dominio import (Producto, InventarioError, ProductoNoEncontradoError, HistorialVacioError, ConflictoVersionError,
+                     validarPrecioStock, formatearCentimos)
+from negocio import (AccionAgregarProducto, AccionEliminarProducto, AccionDescontarStock, AccionActualizarProducto,
+                     AccionSincronizacion, AccionReservarStock, AccionConfirmarReserva, AccionCancelarReserva,
+                     AccionActualizacionLote)
+from reservas import GestorReservas
+from eventos import BusEventos, datosProducto
+from cache import CacheVistas, claveEstrategia
+from vistas import AlmacenProductos, Cursor, VistaProductos
+from indices import IndicePrecio, IndiceCategorias, IndiceTrigramas, IndicePrefijos, IndiceCodigos, claveCodigo, claveCategoria
+
+COLUMNAS_IMPORTACION = 5
+
+class ReporteImportacion:
+    """Filas aceptadas y rechazadas de una importación, con el motivo de cada rechazo."""
 
-class ImportadorArchivo:
     def __init__(self):
-        self.__fechaImportacion = datetime.now()
+        self.__aceptadas = 0
+        self.__rechazos = []
+
+    def registrarAceptada(self):
+        self.__aceptadas += 1
+
+    def registrarRechazo(self, fila, motivo):
+        self.__rechazos.append((fila, motivo))
+
+    def get_aceptadas(self): return self.__aceptadas
+    def get_rechazos(self): return self.__rechazos
+    def get_totalRechazadas(self): return len(self.__rechazos)
+
+    def resumen(self):
+        conteo = {}
+        for _, motivo in self.__rechazos:
+            conteo[motivo] = conteo.get(motivo, 0) + 1
+        return conteo
+
+
+class ImportadorArchivo:
+    def __init__(self, codificacion=None, delimitador=None):
+        # Sin codificación ni separador se detectan mirando el archivo.
+        self.__fechaImportacion = ahora()
+        self.__reporte = ReporteImportacion()
+        self.__codificacion = codificacion
+        self.__delimitador = delimitador
+        self.__formato = None
+        self.__decimal = None
+        self.__codigosIncompletos = []
+
+    def get_reporte(self): return self.__reporte
+    def get_codigosIncompletos(self): return self.__codigosIncompletos
+    def get_formato(self): return self.__formato
+    def get_fechaImportacion(self): return aFecha(self.__fechaImportacion)
+
+    def leerFilas(self, ruta_archivo):
+        """Genera (línea, fila) para cada fila con todas las columnas; el resto queda en el reporte."""
+        import ingesta  # Sólo se carga cuando realmente se importa un archivo.
+
+        self.__reporte = reporte = ReporteImportacion()
+        self.__codigosIncompletos = incompletos = []
 
-    def importarInventario(self, ruta_archivo):
-        productos_leidos = []
-        
         if not os.path.exists(ruta_archivo):
             raise FileNotFoundError(f"El archivo '{ruta_archivo}' no fue encontrado en el sistema.")
 
+        self.__formato = formato = ingesta.detectarFormato(ruta_archivo, self.__codificacion, self.__delimitador)
+        self.__decimal = None if formato.delimitador == "," else ingesta.normalizarDecimal
+        # Las filas salen siempre en el orden codigo, nombre, categoria,
+        # cantidad, precio, sin importar el orden de las columnas del archivo.
+        columnas = formato.columnas
+        necesarias = max(columnas) + 1
+        reordenar = None if columnas == tuple(range(COLUMNAS_IMPORTACION)) else operator.itemgetter(*columnas)
+
+        registros = ingesta.leerRegistros(ruta_archivo, formato)
+        if formato.encabezado:
+            next(registros, None)
+
+        # Los números de fila coinciden con los del archivo.
+        for i, fila in enumerate(registros, start=2 if formato.encabezado else 1):
+            if not fila:
+                continue
+            if len(fila) < necesarias:
+                reporte.registrarRechazo(i, "Faltan columnas.")
+                # El código de una fila cortada sirve para no darla por ausente.
+                if len(fila) > columnas[0]:
+                    incompletos.append(fila[columnas[0]])
+                continue
+            yield i, (fila if reordenar is None else reordenar(fila))
+
+    def validarFila(self, i, fila):
+        cod, nom, cat, cant, prec = fila[:COLUMNAS_IMPORTACION]
+        if self.__decimal is not None:
+            prec = self.__decimal(prec)
         try:
-            with open(ruta_archivo, mode='r', encoding='utf-8') as f:
-                lector_csv = csv.reader(f, delimiter=',')
-                next(lector_csv, None) # Saltar encabezado
-                
-                for i, fila in enumerate(lector_csv, start=1):
-                    try:
-                        if len(fila) < 5: continue
-                        
-                        cod = fila[0]
-                        nom = fila[1]
-                        cat = fila[2]
-                        cant = fila[3]
-                        prec = fila[4]
-
-                        prod = Producto(nom, cat, cant, prec, codigo=cod)
-                        productos_leidos.append(prod)
-                    except ValueError:
-                        continue
-            return productos_leidos
-
-        except Exception as e:
-            raise e
+            prec, cant = validarPrecioStock(prec, cant)
+        except ValueError as e:
+            self.__reporte.registrarRechazo(i, str(e))
+            return None
+        return cod, nom, cat, cant, prec
+
+    def filasValidas(self, ruta_archivo):
+        """Genera (codigo, nombre, categoria, cantidad, centimos) ya convertidos."""
+        for i, fila in self.leerFilas(ruta_archivo):
+            datos = self.validarFila(i, fila)
+            if datos is None:
+                continue
+            self.__reporte.registrarAceptada()
+            yield datos
+
+    def importarInventario(self, ruta_archivo):
+        return crearProductos(self.filasValidas(ruta_archivo))
+
+
+def crearProductos(filas):
+    # Todos los productos de un mismo archivo comparten la marca de creación.
+    with congelado():
+        return [Producto(nom, cat, cant, codigo=cod, centimos=prec) for cod, nom, cat, cant, prec in filas]
+
+
+def exportarProductos(productos, ruta):
+    """Escribe los productos en el formato clásico de importación (con encabezado)."""
+    import csv
+    with open(ruta, mode='w', encoding='utf-8', newline='') as f:
+        escritor = csv.writer(f)
+        escritor.writerow(("codigo", "nombre", "categoria", "cantidad", "precio"))
+        escritor.writerows((p.get_codigo(), p.get_nombre(), p.get_categoria(), p.get_cantidad(),
+                            formatearCentimos(p.get_centimos())) for p in productos)
+
+
+def huellaFila(fila):
+    # Sólo cuentan las columnas que la sincronización aplica (código,
+    # cantidad y precio); un cambio de nombre o categoría no se sincroniza.
+    import zlib
+    cod, _, _, cant, prec = fila[:COLUMNAS_IMPORTACION]
+    return zlib.crc32("\x1f".join((cod, cant, prec)).encode("utf-8"))
+
+
+class ResultadoSincronizacion:
+    def __init__(self, agregados, actualizados, sin_cambios, ausentes, eliminados):
+        self.__agregados = agregados
+        self.__actualizados = actualizados
+        self.__sin_cambios = sin_cambios
+        self.__ausentes = ausentes
+        self.__eliminados = eliminados
+
+    def get_agregados(self): return self.__agregados
+    def get_actualizados(self): return self.__actualizados
+    def get_sinCambios(self): return self.__sin_cambios
+    def get_ausentes(self): return self.__ausentes
+    def get_eliminados(self): return self.__eliminados
 
 #==================================
 
+class EstadoProductos:
+    """Lista de productos e índices que se publican juntos."""
+
+    def __init__(self, almacen=None):
+        self.almacen = AlmacenProductos() if almacen is None else almacen
+        self.precio = IndicePrecio()
+        self.categorias = IndiceCategorias()
+        self.trigramas = IndiceTrigramas()
+        self.prefijos = IndicePrefijos()
+        self.codigos = IndiceCodigos()
+        self.orden = {}      # id(producto) -> número de llegada
+        self.secuencia = 0
+        self.retirados = []  # (id, número) que se quitan de `orden` al consolidar
+
+    def get_indices(self):
+        return (self.precio, self.categorias, self.trigramas, self.prefijos, self.codigos)
+
+    def indexar(self, producto):
+        self.secuencia += 1
+        self.orden[id(producto)] = self.secuencia
+        for indice in self.get_indices():
+            indice.agregar(producto)
+
+    def desindexar(self, producto):
+        numero = self.orden.get(id(producto))
+        if numero is not None:
+            self.retirados.append((id(producto), numero))
+        for indice in self.get_indices():
+            indice.quitar(producto)
+
+    def consolidar(self):
+        for indice in self.get_indices():
+            indice.consolidar()
+        # Un lector puede estar consultando `orden` por un producto que acaba
+        # de quitarse: las bajas arman otro diccionario en lugar de tocar el
+        # publicado. Si el id ya es de otro producto, la entrada se conserva.
+        if self.retirados:
+            orden = dict(self.orden)
+            for clave, numero in self.retirados:
+                if orden.get(clave) == numero:
+                    del orden[clave]
+            self.orden = orden
+            self.retirados = []
+
+    def derivar(self):
+        """Otro estado con los mismos productos, para preparar cambios sin publicarlos."""
+        nuevo = EstadoProductos(self.almacen.copia())
+        nuevo.precio, nuevo.categorias, nuevo.trigramas, nuevo.prefijos, nuevo.codigos = (
+            indice.copia() for indice in self.get_indices())
+        # `orden` se comparte: las altas sólo suman entradas y las bajas nunca
+        # lo modifican en su lugar (ver consolidar).
+        nuevo.orden = self.orden
+        nuevo.secuencia = self.secuencia
+        return nuevo
+
+
+class CandadoEscritura:
+    """
+    RLock de las escrituras del inventario. Al soltarlo la escritura más
+    externa, los índices incorporan lo acumulado: los lectores, que no toman
+    el candado, sólo ven índices ya consolidados.
+    """
+
+    def __init__(self, alSoltar):
+        self.__candado = threading.RLock()
+        self.__nivel = 0
+        self.__alSoltar = alSoltar
+
+    def __enter__(self):
+        self.__candado.acquire()
+        self.__nivel += 1
+        return self
+
+    def __exit__(self, *excepcion):
+        try:
+            if self.__nivel == 1:
+                self.__alSoltar()
+        finally:
+            self.__nivel -= 1
+            self.__candado.release()
+        return False
+
+
 class Inventario:
+    REINTENTOS_CONFLICTO = 8
+    DURACION_RESERVA = 300  # segundos
+
     def __init__(self):
-        self.__productos = []
+        # Los lectores toman self.__estado una vez y trabajan sobre él; una
+        # importación arma otro EstadoProductos aparte y lo publica de golpe.
+        self.__estado = EstadoProductos()
         self.__historialAcciones = []
+        self.__reporteImportacion = None
+        self.__huellas = {}
+        self.__reservas = GestorReservas()
+        self.__eventos = BusEventos()
+        self.__version = 0
+        self.__cache = CacheVistas()
+        # Las lecturas nunca toman este candado. Sólo lo toman las escrituras
+        # de stock, y sólo durante la comparación de versión y la escritura.
+        self.__escritura = CandadoEscritura(lambda: self.__estado.consolidar())
+        self.__demanda = None
+        self.__vigilante = None
+
+    def get_productos(self):
+        return VistaProductos(self)
+
+    def get_totalProductos(self):
+        return len(self.__estado.almacen)
+
+    def contiene(self, producto):
+        return producto in self.__estado.almacen
 
-    def get_productos_raw(self): return self.__productos
+    def cursor(self, filtro=None):
+        return Cursor(self.__estado.almacen, self.__version, filtro)
+
+    def __almacenEscribible(self):
+        estado = self.__estado
+        if estado.almacen.tieneLectores():
+            estado.almacen = estado.almacen.copia()
+        return estado.almacen
+
+    def _insertar(self, producto):
+        if producto in self.__estado.almacen:
+            raise InventarioError("El producto ya está en el inventario.")
+        self.__almacenEscribible().agregar(producto)
+        self.__indexar(producto)
+
+    def _retirar(self, producto):
+        if producto not in self.__estado.almacen:
+            return
+        self.__almacenEscribible().quitar(producto)
+        self.__desindexar(producto)
+
+    def get_indices(self):
+        return self.__estado.get_indices()
+
+    def get_indice(self, nombre):
+        for indice in self.get_indices():
+            if indice.nombre == nombre:
+                return indice
+        return None
+
+    def _get_estado(self):
+        # Productos, índices y orden de llegada de una misma publicación.
+        return self.__estado
+
+    def get_version(self):
+        return self.__version
+
+    def get_cache(self):
+        return self.__cache
+
+    def __indexar(self, producto):
+        self.__version += 1
+        self.__estado.indexar(producto)
+        producto._set_observador(self)
+        if self.__vigilante is not None:
+            self.__vigilante.productoAgregado(producto)
+        self.__eventos.publicar(producto.get_codigo(), "producto", None, datosProducto(producto))
+
+    def __desindexar(self, producto):
+        self.__version += 1
+        self.__estado.desindexar(producto)
+        producto._set_observador(None)
+        if self.__vigilante is not None:
+            self.__vigilante.productoQuitado(producto)
+        self.__eventos.publicar(producto.get_codigo(), "producto", datosProducto(producto), None)
+
+    def _stockCambiado(self, producto, anterior, nuevo):
+        self.__version += 1
+        for indice in self.get_indices():
+            indice.stockCambiado(producto, anterior, nuevo)
+        if self.__vigilante is not None:
+            self.__vigilante.stockCambiado(producto, anterior, nuevo)
+        self.__eventos.publicar(producto.get_codigo(), "cantidad", anterior, nuevo)
+
+    def _precioCambiado(self, producto, anterior, nuevo):
+        with self.__escritura:
+            self.__version += 1
+            for indice in self.get_indices():
+                indice.precioCambiado(producto, anterior, nuevo)
+        self.__eventos.publicar(producto.get_codigo(), "precio", anterior, nuevo)
+
+    def _reservadoCambiado(self, producto, anterior, nuevo):
+        self.__eventos.publicar(producto.get_codigo(), "reservado", anterior, nuevo)
+
+    def set_registroDemanda(self, registro):
+        # Un demanda.RegistroDemanda que acumula las ventas; None lo desconecta.
+        self.__demanda = registro
+
+    def get_registroDemanda(self):
+        return self.__demanda
+
+    def _registrarDemanda(self, producto, cantidad, marca):
+        if self.__demanda is not None:
+            self.__demanda.registrar(producto.get_codigo(), cantidad, marca)
+
+    def set_vigilanteStock(self, vigilante):
+        # Un alertas.VigilanteStock que revisa cada cambio de stock; None lo desconecta.
+        self.__vigilante = vigilante
+        if vigilante is not None:
+            vigilante.conectar(self)
+
+    def get_vigilanteStock(self):
+        return self.__vigilante
+
+    def get_eventos(self):
+        return self.__eventos
+
+    def _aplicarHuellas(self, cambios):
+        for codigo, huella in cambios:
+            if huella is None:
+                self.__huellas.pop(codigo, None)
+            else:
+                self.__huellas[codigo] = huella
 
     def agregarProducto(self, producto):
-        accion = AccionAgregarProducto(producto)
-        accion.ejecutar(self)
-        self.__historialAcciones.append(accion)
+        with self.__escritura:
+            accion = AccionAgregarProducto(producto)
+            accion.ejecutar(self)
+            self.__historialAcciones.append(accion)
 
     def buscarProducto(self, estrategia, valor):
-        return estrategia.buscar(self.__productos, valor)
+        clave = ("buscar", claveEstrategia(estrategia), valor)
+        resultado = self.__cache.obtener(clave, self.__version, lambda: self.__buscar(estrategia, valor))
+        # Las listas se copian para que quien las reciba no altere el caché.
+        return list(resultado) if isinstance(resultado, list) else resultado
+
+    def __buscar(self, estrategia, valor):
+        indice = self.get_indice(estrategia.indice) if estrategia.indice else None
+        if indice is not None:
+            return estrategia.buscarEnIndice(indice, valor)
+        return estrategia.buscar(self.get_productos(), valor)
+
+    def consultar(self, consulta):
+        return consulta.ejecutar(self)
 
     def eliminarProducto(self, producto):
-        if producto not in self.__productos:
+        if producto not in self.__estado.almacen:
             raise ProductoNoEncontradoError("El producto que intenta eliminar no está en la lista.")
             
-        accion = AccionEliminarProducto(producto)
-        accion.ejecutar(self)
-        self.__historialAcciones.append(accion)
+        with self.__escritura:
+            accion = AccionEliminarProducto(producto)
+            accion.ejecutar(self)
+            self.__historialAcciones.append(accion)
+
+    def descontarStock(self, producto, cantidad, version=None):
+        # Con version (la de producto.get_version() al leerlo) falla con
+        # ConflictoVersionError si otro cambió el producto entretanto.
+        with self.__escritura:
+            self.__reservas.liberarVencidas()
+            accion = AccionDescontarStock(producto, cantidad, version)
+            accion.ejecutar(self) 
+            self.__historialAcciones.append(accion)
+
+    def descontarConReintentos(self, producto, cantidad, reintentos=None):
+        # Lee versión y disponible sin bloquear y confirma con compare-and-set;
+        # ante un conflicto vuelve a leer. El stock insuficiente no se reintenta.
+        reintentos = self.REINTENTOS_CONFLICTO if reintentos is None else reintentos
+        for _ in range(max(1, reintentos)):
+            try:
+                return self.descontarStock(producto, cantidad, producto.get_version())
+            except ConflictoVersionError as conflicto:
+                ultimo = conflicto
+        raise ultimo
+
+    def actualizarStockSiVersion(self, producto, version, cantidad):
+        """Fija el stock sólo si el producto sigue en `version`; la acción se puede deshacer."""
+        if cantidad < 0:
+            raise ValueError("Los valores no pueden ser negativos.")
+        with self.__escritura:
+            if producto.get_version() != version:
+                raise ConflictoVersionError(producto.get_codigo(), version, producto.get_version())
+            accion = AccionActualizarProducto(producto, cantidad, producto.get_centimos())
+            accion.ejecutar(self)
+            self.__historialAcciones.append(accion)
+
+    def actualizarEnLote(self, productos, campo, transformacion):
+        # transformacion recibe la lista de valores actuales y devuelve los
+        # nuevos en el mismo orden; se aplica una sola vez a todo el lote.
+        if campo not in AccionActualizacionLote.CAMPOS:
+            raise ValueError(f"Campo no actualizable en lote: {campo}")
+        productos = list(productos)
+        if not productos:
+            return 0
+        leer = AccionActualizacionLote.CAMPOS[campo][1]
+        nuevos = transformacion([leer(p) for p in productos])
+        if min(nuevos) < 0:
+            raise ValueError("Los valores no pueden ser negativos.")
+
+        with self.__escritura:
+            # Lo reservado se compara con el candado tomado: una reserva que
+            # llega entre el cálculo y la escritura también cuenta.
+            if campo == "cantidad":
+                for producto, cantidad in zip(productos, nuevos):
+                    if cantidad < producto.get_reservado():
+                        raise InventarioError(
+                            f"El stock de '{producto.get_codigo()}' ({cantidad}) quedaría por debajo "
+                            f"de lo reservado ({producto.get_reservado()}).")
+            accion = AccionActualizacionLote(productos, campo, nuevos)
+            accion.ejecutar(self)
+            self.__historialAcciones.append(accion)
+        return len(productos)
+
+    def ajustarPrecios(self, porcentaje, consulta=None):
+        productos = self.get_productos() if consulta is None else self.consultar(consulta)
+        # El factor se aplica en aritmética decimal y se redondea al céntimo
+        # (mitad hacia arriba): +10% sobre 0,05 da 0,06, no 0,05 por un float.
+        porcentaje = Decimal(repr(porcentaje)) if isinstance(porcentaje, float) else Decimal(porcentaje)
+        factor = 1 + porcentaje / 100
+        return self.actualizarEnLote(
+            productos, "precio",
+            lambda centimos: [int((c * factor).to_integral_value(rounding=ROUND_HALF_UP)) for c in centimos])
+
+    def fijarStockDesdeConteo(self, conteo):
+        # conteo: {codigo: cantidad contada}; todos los códigos deben existir.
+        productos = []
+        for codigo in conteo:
+            producto = self.__estado.codigos.buscar(codigo)
+            if producto is None:
+                raise ProductoNoEncontradoError(f"El código '{codigo}' no existe en el inventario.")
+            productos.append(producto)
+        cantidades = [int(c) for c in conteo.values()]
+        return self.actualizarEnLote(productos, "cantidad", lambda _: cantidades)
+
+    def _get_gestorReservas(self):
+        return self.__reservas
 
-    def descontarStock(self, producto, cantidad):
-        accion = AccionDescontarStock(producto, cantidad)
-        accion.ejecutar(self) 
-        self.__historialAcciones.append(accion)
+    def _get_candadoEscritura(self):
+        # Para operaciones que escriben en más de un inventario a la vez
+        # (transferencias entre almacenes).
+        return self.__escritura
 
+    def reservarStock(self, producto, cantidad, duracion=None):
+        with self.__escritura:
+            accion = AccionReservarStock(producto, cantidad, self.DURACION_RESERVA if duracion is None else duracion)
+            accion.ejecutar(self)
+            self.__historialAcciones.append(accion)
+        return accion.get_reserva()
+
+    def confirmarReserva(self, id_reserva):
+        with self.__escritura:
+            self.__reservas.liberarVencidas()
+            accion = AccionConfirmarReserva(self.__reservas.get_reserva(id_reserva))
+            accion.ejecutar(self)
+            self.__historialAcciones.append(accion)
+
+    def cancelarReserva(self, id_reserva):
+        with self.__escritura:
+            accion = AccionCancelarReserva(self.__reservas.get_reserva(id_reserva))
+            accion.ejecutar(self)
+            self.__historialAcciones.append(accion)
+
+    def liberarReservasVencidas(self):
+        return self.__reservas.liberarVencidas()
 
 #=========================================
 
-    def ordenarInventario(self, criterio):
-        return criterio.ordenar(self.__productos)
+    def ordenarInventario(self, criterio, categoria=None):
+        clave = ("ordenar", claveEstrategia(criterio), None if categoria is None else claveCategoria(categoria))
+        return list(self.__cache.obtener(clave, self.__version, lambda: self.__ordenar(criterio, categoria)))
+
+    def __ordenar(self, criterio, categoria):
+        if categoria is None:
+            # Si el criterio declara un índice que ya entrega ese orden, no
+            # hace falta ordenar nada.
+            indice = self.get_indice(criterio.indice) if criterio.indice else None
+            if indice is not None and indice.entregaOrdenadoPor(criterio):
+                return indice.ordenados()
+            return criterio.ordenar(self.get_productos())
+        particion = self.__estado.categorias.get_particion(categoria)
+        return criterio.ordenar(particion) if particion else []
+
+    def get_particionCategoria(self, categoria):
+        return self.__estado.categorias.get_particion(categoria)
+
+    def resumenCategorias(self):
+        return sorted(self.__estado.categorias.get_particiones(), key=lambda c: c.get_nombre().lower())
 
     def importarDesdeArchivo(self, ruta):
         imp = ImportadorArchivo()
         lista = imp.importarInventario(ruta)
-        
-        count = 0
-        duplicados = 0
-        for p in lista:
-            existe = self.buscarProducto(BusquedaPorCodigo(), p.get_codigo())
-            if not existe:
-                self.agregarProducto(p)
-                count += 1
-            else:
-                duplicados += 1
-        return count, duplicados
+        self.__reporteImportacion = imp.get_reporte()
+        return self.__agregarImportados(lista)
+
+    def importarFilas(self, filas, reporte=None):
+        # Para filas ya leídas y validadas en otro lado (por ejemplo, en otro
+        # proceso); cada fila es (codigo, nombre, categoria, cantidad, centimos).
+        if reporte is not None:
+            self.__reporteImportacion = reporte
+        return self.__agregarImportados(crearProductos(filas))
+
+    def __agregarImportados(self, lista):
+        lista = list(lista)
+        # Los productos nuevos se indexan en un estado derivado del actual,
+        # mientras los lectores siguen usando el anterior completo; al final se
+        # publica con una sola asignación. El derivado comparte con el actual
+        # lo que no cambia y sólo copia las colecciones que toca, así que
+        # importar pocas filas cuesta poco aunque el inventario sea grande.
+        # Las escrituras esperan a que termine.
+        acciones = []
+        with self.__escritura, congelado():
+            actual = self.__estado
+            # Primero se descartan los repetidos: si no queda nada nuevo no
+            # hace falta armar otro estado.
+            vistos = set()
+            nuevos = []
+            for producto in lista:
+                clave = claveCodigo(producto.get_codigo())
+                if clave in vistos or actual.codigos.buscar(clave) is not None or producto in actual.almacen:
+                    continue
+                vistos.add(clave)
+                nuevos.append(producto)
+
+            if not nuevos:
+                return 0, len(lista)
+
+            nuevo = actual.derivar()
+            for producto in nuevos:
+                nuevo.almacen.agregar(producto)
+                nuevo.indexar(producto)
+                producto._set_observador(self)
+                # Cada alta queda en el historial por separado, como si se
+                # hubiera agregado a mano.
+                acciones.append(AccionAgregarProducto(producto))
+            nuevo.consolidar()
+
+            self.__estado = nuevo
+            self.__version += 1
+            self.__historialAcciones.extend(acciones)
+            if self.__vigilante is not None:
+                for producto in nuevos:
+                    self.__vigilante.productoAgregado(producto)
+        if self.__eventos.hayOyentes():
+            for accion in acciones:
+                producto = accion.get_producto()
+                self.__eventos.publicar(producto.get_codigo(), "producto", None, datosProducto(producto))
+        return len(acciones), len(lista) - len(acciones)
+
+    def sincronizarDesdeArchivo(self, ruta, eliminarAusentes=False):
+        # Sólo se procesan las filas que cambiaron desde la sincronización
+        # anterior: las idénticas se descartan comparando su huella, sin
+        # convertir valores. Toda la sincronización se deshace de una vez.
+        imp = ImportadorArchivo()
+        acciones = []
+        cambios_huellas = {}
+        vistos = set()
+        agregados = actualizados = sin_cambios = 0
+
+        # Una sola marca para todas las altas y cambios de la sincronización.
+        with self.__escritura, congelado():
+            for i, fila in imp.leerFilas(ruta):
+                clave = claveCodigo(fila[0])
+                if not clave:
+                    imp.get_reporte().registrarRechazo(i, "Falta el código.")
+                    continue
+                if clave in vistos:
+                    imp.get_reporte().registrarRechazo(i, "Código repetido en el archivo.")
+                    continue
+                vistos.add(clave)
+
+                huella = huellaFila(fila)
+                anterior = self.__huellas.get(clave)
+                # La huella sólo dice que la fila no cambió; si el producto se
+                # eliminó después de la última sincronización hay que volver a
+                # darlo de alta.
+                if anterior == huella and self.__estado.codigos.buscar(clave) is not None:
+                    sin_cambios += 1
+                    continue
+
+                datos = imp.validarFila(i, fila)
+                if datos is None:
+                    continue
+                cod, nom, cat, cant, prec = datos
+                existente = self.__estado.codigos.buscar(clave)
+                # No se baja el stock por debajo de lo reservado: la fila se
+                # rechaza y conserva la huella anterior para reintentarla.
+                if existente is not None and cant < existente.get_reservado():
+                    imp.get_reporte().registrarRechazo(i, "La cantidad es menor que lo reservado.")
+                    continue
+                imp.get_reporte().registrarAceptada()
+                cambios_huellas[clave] = (anterior, huella)
+
+                if existente is None:
+                    acciones.append(AccionAgregarProducto(Producto(nom, cat, cant, codigo=cod, centimos=prec)))
+                    agregados += 1
+                elif existente.get_cantidad() != cant or existente.get_centimos() != prec:
+                    acciones.append(AccionActualizarProducto(existente, cant, prec))
+                    actualizados += 1
+                else:
+                    sin_cambios += 1
+
+            # Una fila rechazada por faltarle columnas sigue en el archivo:
+            # su producto no está ausente y conserva la huella anterior.
+            vistos.update(claveCodigo(c) for c in imp.get_codigosIncompletos())
+            ausentes = [c for c in self.__huellas if c not in vistos]
+            eliminados = 0
+            for clave in ausentes:
+                cambios_huellas[clave] = (self.__huellas[clave], None)
+                existente = self.__estado.codigos.buscar(clave)
+                if eliminarAusentes and existente is not None:
+                    acciones.append(AccionEliminarProducto(existente))
+                    eliminados += 1
+
+            self.__reporteImportacion = imp.get_reporte()
+            if cambios_huellas:
+                accion = AccionSincronizacion(acciones, cambios_huellas, ruta)
+                accion.ejecutar(self)
+                self.__historialAcciones.append(accion)
+
+        return ResultadoSincronizacion(agregados, actualizados, sin_cambios, len(ausentes), eliminados)
+
+    # ---- Persistencia (la usa la línea de comandos entre ejecuciones) ----
+    def get_estadoPersistente(self, maxHistorial=None):
+        """Productos en orden de llegada, historial, huellas y reservas, listos para pickle."""
+        historial = self.__historialAcciones
+        if maxHistorial is not None:
+            historial = historial[-maxHistorial:] if maxHistorial > 0 else []
+        return {"productos": list(self.get_productos()), "historial": list(historial),
+                "huellas": dict(self.__huellas), "reservas": self.__reservas.get_estadoPersistente()}
+
+    @classmethod
+    def desdeEstadoPersistente(cls, datos):
+        # Las acciones del historial apuntan a los mismos objetos Producto
+        # (pickle conserva las referencias compartidas), así que se pueden
+        # deshacer igual que en la sesión que las creó. Lo mismo vale para las
+        # reservas: las activas y las del historial son los mismos objetos.
+        inventario = cls()
+        inventario.__restaurar(datos["productos"], datos["historial"], datos["huellas"], datos["reservas"])
+        return inventario
+
+    def __restaurar(self, productos, historial, huellas, reservas):
+        with self.__escritura:
+            estado = EstadoProductos()
+            for producto in productos:
+                estado.almacen.agregar(producto)
+                estado.indexar(producto)
+                producto._set_observador(self)
+            estado.consolidar()
+            self.__estado = estado
+            self.__historialAcciones = list(historial)
+            self.__huellas = dict(huellas)
+            self.__reservas.restaurar(reservas, [accion.get_reserva() for accion in historial if isinstance(
+                accion, (AccionReservarStock, AccionConfirmarReserva, AccionCancelarReserva))])
+            self.__version += 1
+
+    def get_reporteImportacion(self):
+        return self.__reporteImportacion
 
     def get_ultima_accion(self):
         if self.__historialAcciones:
@@ -95,10 +710,10 @@ class Inventario:
         return None
 
     def revertirUltimaAccion(self):
-        if not self.__historialAcciones:
-            raise HistorialVacioError("No existen acciones previas para deshacer.")
-            
-        accion = self.__historialAcciones.pop()
-        accion.revertir(self)
+        with self.__escritura:
+            if not self.__historialAcciones:
+                raise HistorialVacioError("No existen acciones previas para deshacer.")
+            accion = self.__historialAcciones.pop()
+            accion.revertir(self)
         return True
 
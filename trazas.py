@@ -0,0 +1,239 @@
+import random
+import time
+
+import negocio
+from dominio import Producto, InventarioError
+from eventos import datosProducto
+
+# =============================================================================
+# TRAZAS DE OPERACIONES: GRABACIÓN Y REPRODUCCIÓN
+# =============================================================================
+# Un GrabadorTrazas anota las operaciones que recibe un Inventario (sólo las
+# de primer nivel: las altas internas de una importación no se repiten) con
+# el instante relativo en que llegaron. La Traza resultante se guarda como
+# JSON por líneas: la primera lleva los productos iniciales y cada una de las
+# siguientes es [segundos, operacion, argumentos].
+#
+# reproducir() vuelve a ejecutar una traza contra cualquier inventario (otra
+# versión del código, otra configuración) a la velocidad pedida y devuelve
+# rendimiento y percentiles de latencia por operación. Las estrategias se
+# guardan con su nombre en negocio.BUSQUEDAS / negocio.CRITERIOS (los
+# criterios compuestos, como "categoria,precio-desc") y se recrean desde el
+# registro con sus parámetros por defecto.
+#
+# Operaciones: agregar, buscar, ordenar, descontar, eliminar, deshacer,
+# importar.
+
+def _agregar(inv, codigo, nombre, categoria, cantidad, centimos):
+    inv.agregarProducto(Producto(nombre, categoria, cantidad, codigo=codigo, centimos=centimos))
+
+
+def _producto(inv, codigo):
+    producto = inv.get_indice("codigos").buscar(codigo)
+    if producto is None:
+        raise InventarioError(f"El código '{codigo}' no existe en el inventario.")
+    return producto
+
+
+EJECUTORES = {
+    "agregar": _agregar,
+    "buscar": lambda inv, estrategia, valor: inv.buscarProducto(negocio.BUSQUEDAS[estrategia].fabrica(), valor),
+    "ordenar": lambda inv, criterio, categoria: inv.ordenarInventario(negocio.crearCriterio(criterio), categoria),
+    "descontar": lambda inv, codigo, cantidad: inv.descontarStock(_producto(inv, codigo), cantidad),
+    "eliminar": lambda inv, codigo: inv.eliminarProducto(_producto(inv, codigo)),
+    "deshacer": lambda inv: inv.revertirUltimaAccion(),
+    "importar": lambda inv, ruta: inv.importarDesdeArchivo(ruta),
+}
+
+# metodo del Inventario -> (operación, conversión de sus argumentos)
+GRABABLES = {
+    "agregarProducto": ("agregar", lambda p: [p.get_codigo(), *datosProducto(p)]),
+    "buscarProducto": ("buscar", lambda e, valor: [negocio.nombreBusqueda(e), valor]),
+    "ordenarInventario": ("ordenar", lambda c, categoria=None: [negocio.nombreCriterio(c), categoria]),
+    "descontarStock": ("descontar", lambda p, cantidad, version=None: [p.get_codigo(), cantidad]),
+    "eliminarProducto": ("eliminar", lambda p: [p.get_codigo()]),
+    "revertirUltimaAccion": ("deshacer", lambda: []),
+    "importarDesdeArchivo": ("importar", lambda ruta: [ruta]),
+}
+
+
+class Traza:
+    def __init__(self, inicial=(), operaciones=()):
+        self.inicial = [list(f) for f in inicial]      # filas (codigo, nombre, categoria, cantidad, centimos)
+        self.operaciones = [list(o) for o in operaciones]  # [segundos, operacion, argumentos]
+
+    def __len__(self):
+        return len(self.operaciones)
+
+    def guardar(self, ruta):
+        import json
+        with open(ruta, mode='w', encoding='utf-8') as f:
+            f.write(json.dumps({"inicial": self.inicial}, ensure_ascii=False) + "\n")
+            for operacion in self.operaciones:
+                f.write(json.dumps(operacion, ensure_ascii=False) + "\n")
+
+    @classmethod
+    def cargar(cls, ruta):
+        import json
+        with open(ruta, mode='r', encoding='utf-8') as f:
+            cabecera = json.loads(f.readline())
+            return cls(cabecera["inicial"], (json.loads(linea) for linea in f if linea.strip()))
+
+
+class GrabadorTrazas:
+    def __init__(self, inventario):
+        self.__traza = Traza([[p.get_codigo(), *datosProducto(p)] for p in inventario.get_productos()])
+        self.__inicio = time.perf_counter()
+        self.__profundidad = 0
+        # Igual que el perfilador: se envuelve la instancia, no la clase.
+        for metodo, (operacion, convertir) in GRABABLES.items():
+            setattr(inventario, metodo, self.__envolver(operacion, convertir, getattr(inventario, metodo)))
+
+    def get_traza(self):
+        return self.__traza
+
+    def __envolver(self, operacion, convertir, metodo):
+        def envoltorio(*args, **kwargs):
+            if self.__profundidad == 0:
+                instante = round(time.perf_counter() - self.__inicio, 6)
+                self.__traza.operaciones.append([instante, operacion, convertir(*args, **kwargs)])
+            self.__profundidad += 1
+            try:
+                return metodo(*args, **kwargs)
+            finally:
+                self.__profundidad -= 1
+        return envoltorio
+
+
+# =============================================================================
+# TRAZAS SINTÉTICAS
+# =============================================================================
+
+MEZCLA_POR_DEFECTO = {"buscar": 50, "descontar": 25, "agregar": 12, "ordenar": 5, "eliminar": 4, "deshacer": 4}
+
+
+def generarTraza(operaciones, productos=1000, mezcla=None, porSegundo=1000, semilla=0):
+    """Traza con `productos` iniciales y `operaciones` elegidas según `mezcla` (pesos)."""
+    azar = random.Random(semilla)
+    mezcla = mezcla or MEZCLA_POR_DEFECTO
+    nombres = list(mezcla)
+    pesos = list(mezcla.values())
+    categorias = [f"Categoria {i}" for i in range(20)]
+    busquedas = list(negocio.BUSQUEDAS)
+    criterios = list(negocio.CRITERIOS)
+
+    inicial = [[f"T{i}", f"Producto {i}", categorias[i % 20], azar.randint(0, 500), azar.randint(100, 300000)]
+               for i in range(productos)]
+    codigos = [fila[0] for fila in inicial]
+    siguiente = productos
+    traza = Traza(inicial)
+
+    for n in range(operaciones):
+        instante = round(n / porSegundo, 6)
+        operacion = azar.choices(nombres, pesos)[0]
+        if operacion == "agregar":
+            codigo = f"T{siguiente}"
+            siguiente += 1
+            codigos.append(codigo)
+            argumentos = [codigo, f"Producto {siguiente}", azar.choice(categorias),
+                          azar.randint(0, 500), azar.randint(100, 300000)]
+        elif operacion == "buscar":
+            estrategia = azar.choice(busquedas)
+            i = azar.randrange(siguiente)
+            valor = f"T{i}" if estrategia == "codigo" else f"Producto {i}"[:azar.randint(4, 12)]
+            argumentos = [estrategia, valor]
+        elif operacion == "ordenar":
+            argumentos = [azar.choice(criterios), azar.choice([None] + categorias)]
+        elif operacion == "descontar":
+            argumentos = [azar.choice(codigos), azar.randint(1, 5)]
+        elif operacion == "eliminar":
+            argumentos = [azar.choice(codigos)]
+        else:
+            argumentos = []
+        traza.operaciones.append([instante, operacion, argumentos])
+    return traza
+
+
+# =============================================================================
+# REPRODUCCIÓN
+# =============================================================================
+
+def percentil(ordenados, p):
+    # Método del rango más cercano sobre una lista ya ordenada.
+    if not ordenados:
+        return 0.0
+    return ordenados[min(len(ordenados) - 1, max(0, round(p / 100 * len(ordenados)) - 1))]
+
+
+class ResultadoReproduccion:
+    def __init__(self, latencias, errores, segundos):
+        self.__latencias = {op: sorted(valores) for op, valores in latencias.items()}
+        self.__errores = errores
+        self.__segundos = segundos
+
+    def get_total(self):
+        return sum(len(v) for v in self.__latencias.values())
+
+    def get_errores(self):
+        return dict(self.__errores)
+
+    def get_segundos(self):
+        return self.__segundos
+
+    def get_rendimiento(self):
+        return self.get_total() / self.__segundos if self.__segundos else 0.0
+
+    def get_percentiles(self, operacion=None):
+        if operacion is None:
+            valores = sorted(v for lista in self.__latencias.values() for v in lista)
+        else:
+            valores = self.__latencias.get(operacion, [])
+        return {p: percentil(valores, p) for p in (50, 95, 99)}
+
+    def resumen(self):
+        lineas = [f"{self.get_total()} operaciones en {self.__segundos:.3f} s "
+                  f"({self.get_rendimiento():,.0f} op/s)",
+                  f"{'Operación':<12} {'Cant.':>7} {'Errores':>8} {'p50 (µs)':>10} {'p95 (µs)':>10} {'p99 (µs)':>10}"]
+        for operacion in sorted(self.__latencias):
+            p = self.get_percentiles(operacion)
+            lineas.append(f"{operacion:<12} {len(self.__latencias[operacion]):>7} "
+                          f"{self.__errores.get(operacion, 0):>8} "
+                          f"{p[50] * 1e6:>10.1f} {p[95] * 1e6:>10.1f} {p[99] * 1e6:>10.1f}")
+        p = self.get_percentiles()
+        lineas.append(f"{'total':<12} {self.get_total():>7} {sum(self.__errores.values()):>8} "
+                      f"{p[50] * 1e6:>10.1f} {p[95] * 1e6:>10.1f} {p[99] * 1e6:>10.1f}")
+        return "\n".join(lineas)
+
+
+def reproducir(traza, fabrica=None, velocidad=None):
+    """
+    Ejecuta la traza contra fabrica() (por defecto un Inventario nuevo).
+    velocidad=None reproduce lo más rápido posible; 1 respeta los tiempos
+    grabados, 2 va al doble, etc.
+    """
+    if fabrica is None:
+        from sistema import Inventario
+        fabrica = Inventario
+    inventario = fabrica()
+    inventario.importarFilas(traza.inicial)
+
+    latencias = {}
+    errores = {}
+    inicio = time.perf_counter()
+    for instante, operacion, argumentos in traza.operaciones:
+        ejecutar = EJECUTORES[operacion]
+        comienzo = time.perf_counter()
+        if velocidad:
+            programado = inicio + instante / velocidad
+            if programado > comienzo:
+                time.sleep(programado - comienzo)
+            # Con ritmo fijo la latencia se cuenta desde el instante en que la
+            # operación debía empezar: si el sistema se atrasa, la espera cuenta.
+            comienzo = programado
+        try:
+            ejecutar(inventario, *argumentos)
+        except (InventarioError, ValueError):
+            errores[operacion] = errores.get(operacion, 0) + 1
+        latencias.setdefault(operacion, []).append(time.perf_counter() - comienzo)
+
+    return ResultadoReproduccion(latencias, errores, time.perf_counter() - inicio)
@@ -0,0 +1,107 @@
+from itertools import islice
+
+# =============================================================================
+# ALMACENAMIENTO Y VISTAS DE PRODUCTOS
+# =============================================================================
+# El inventario guarda sus productos en un AlmacenProductos (diccionario con
+# orden de llegada: alta, baja y pertenencia en O(1)). Nadie fuera del
+# inventario recibe esa colección: se lee a través de VistaProductos y de
+# cursores. Un cursor recorre la foto del almacén tomada al abrirlo; si
+# mientras tanto llega un alta o una baja, el inventario copia el almacén
+# antes de escribir (copy-on-write) y el cursor sigue viendo la foto vieja.
+# Si no hay cursores abiertos, se escribe sin copiar.
+
+class AlmacenProductos:
+    def __init__(self, productos=()):
+        self.__productos = dict.fromkeys(productos)
+        self.__lectores = 0
+
+    def __len__(self):
+        return len(self.__productos)
+
+    def __contains__(self, producto):
+        return producto in self.__productos
+
+    def tieneLectores(self):
+        return self.__lectores > 0
+
+    def copia(self):
+        nuevo = AlmacenProductos()
+        nuevo.__productos = self.__productos.copy()
+        return nuevo
+
+    def agregar(self, producto):
+        self.__productos[producto] = None
+
+    def quitar(self, producto):
+        del self.__productos[producto]
+
+    def _abrir(self):
+        self.__lectores += 1
+        return self.__productos
+
+    def _cerrar(self):
+        self.__lectores -= 1
+
+
+class Cursor:
+    """Recorre los productos tal como estaban al abrirlo, aunque luego cambien."""
+
+    def __init__(self, almacen, version, filtro=None):
+        self.__abierto = False
+        self.__almacen = almacen
+        self.__version = version
+        productos = almacen._abrir()
+        self.__abierto = True
+        self.__iterador = iter(productos) if filtro is None else filter(filtro, productos)
+
+    def get_version(self):
+        return self.__version
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if not self.__abierto:
+            raise StopIteration
+        try:
+            return next(self.__iterador)
+        except StopIteration:
+            self.cerrar()
+            raise
+
+    def siguientes(self, cantidad):
+        return list(islice(self, cantidad))
+
+    def cerrar(self):
+        if self.__abierto:
+            self.__abierto = False
+            self.__almacen._cerrar()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+    def __del__(self):
+        self.cerrar()
+
+
+class VistaProductos:
+    """Vista de sólo lectura de los productos de un inventario."""
+
+    def __init__(self, inventario):
+        self.__inventario = inventario
+
+    def __len__(self):
+        return self.__inventario.get_totalProductos()
+
+    def __contains__(self, producto):
+        return self.__inventario.contiene(producto)
+
+    def __iter__(self):
+        return self.__inventario.cursor()
+
+    def filtrar(self, predicado):
+        return self.__inventario.cursor(predicado)